@@ -0,0 +1,319 @@
+"""Бенчмарки горячих путей всех утилит.
+
+    python benchmarks/bench.py                       # масштаб small, сравнение с baseline.json, если он есть
+    python benchmarks/bench.py --scale large --only phonebook
+    python benchmarks/bench.py --save-baseline       # записать текущие результаты как эталон
+
+Результаты пишутся в JSON. Для каждого замера хранится лучшее время из
+нескольких повторов и скорость (единиц работы в секунду). При сравнении с
+эталоном замер считается регрессией, если скорость упала больше чем на порог.
+Эталон зависит от машины, поэтому в репозиторий не входит: его нужно один раз
+снять через --save-baseline на той машине, где будут идти сравнения.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import datagen
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+for _project in ("project2_phonebook", "project3_text_analyzer", "project4_expenses", "project5_todo", "project6_backup"):
+    sys.path.insert(0, os.path.join(ROOT, _project))
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+MB = 1024 * 1024
+
+SCALES = {
+    "small": {
+        "contacts": [10**4],
+        "expenses_inserts": [500],
+        "expenses_rows": [10**4],
+        "tasks": [500],
+        "text_mb": [1],
+        "backup": {"many_small": (2000, 4 * 1024), "few_large": (4, 8 * MB)},
+    },
+    "medium": {
+        "contacts": [10**4, 10**5],
+        "expenses_inserts": [2000],
+        "expenses_rows": [10**5],
+        "tasks": [2000],
+        "text_mb": [1, 10],
+        "backup": {"many_small": (20000, 4 * 1024), "few_large": (8, 32 * MB)},
+    },
+    "large": {
+        "contacts": [10**4, 10**5, 10**6, 10**7],
+        "expenses_inserts": [10000],
+        "expenses_rows": [10**6],
+        "tasks": [10000],
+        "text_mb": [1, 10, 100],
+        "backup": {"many_small": (200000, 4 * 1024), "few_large": (16, 128 * MB)},
+    },
+}
+TEXT_ENCODINGS = ("utf-8", "cp1251", "utf-16")
+
+
+class Runner:
+    def __init__(self, workdir: str, repeat: int, only=None):
+        self.workdir = workdir
+        self.repeat = repeat
+        self.only = only
+        self.results = {}
+
+    def wanted(self, name: str) -> bool:
+        return not self.only or any(part in name for part in self.only)
+
+    def measure(self, name: str, run, work: float, unit: str, setup=None):
+        """Запускает run(state) repeat раз, setup() перед каждым повтором не входит во время"""
+        if not self.wanted(name):
+            return
+        best = None
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                run(state)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        self.results[name] = {"seconds": best, "work": work, "unit": unit, "rate": work / best if best else 0.0}
+        print(f"{name:<45} {best:>9.3f} с {work / best if best else 0:>14,.1f} {unit}/с")
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.workdir, *parts)
+
+
+def fresh(path: str) -> str:
+    """Удаляет базу вместе с файлами WAL, закрыв её общее соединение"""
+    from common import storage
+    storage.close(path)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return path
+
+
+def bench_phonebook(r: Runner, scale: dict):
+    import phonebook
+    db = r.path("phonebook.db")
+    for n in scale["contacts"]:
+        csv_path, json_path = r.path(f"contacts_{n}.csv"), r.path(f"contacts_{n}.json")
+        if not any(r.wanted(f"phonebook.{op}[{n}]") for op in ("import_csv", "import_json", "export_csv", "export_json", "list", "import_csv_dedup")):
+            continue
+        datagen.write_contacts_csv(csv_path, n)
+        datagen.write_contacts_json(json_path, n)
+
+        def setup():
+            phonebook.init_db(fresh(db))
+
+        r.measure(f"phonebook.import_json[{n}]", lambda _: phonebook.import_json(json_path, skip_duplicates=False, db_path=db), n, "contacts", setup)
+        r.measure(f"phonebook.import_csv[{n}]", lambda _: phonebook.import_csv(csv_path, skip_duplicates=False, db_path=db), n, "contacts", setup)
+        r.measure(f"phonebook.import_csv_dedup[{n}]", lambda _: phonebook.import_csv(csv_path, db_path=db), n, "contacts", setup)
+        # для выгрузки нужна база ровно с n контактами; обычно её оставляет последний импорт
+        if not os.path.exists(db) or \
+                phonebook.get_conn(db).execute("SELECT COUNT(*) FROM contacts").fetchone()[0] != n:
+            setup()
+            with contextlib.redirect_stdout(None):
+                phonebook.import_csv(csv_path, skip_duplicates=False, db_path=db)
+        r.measure(f"phonebook.export_csv[{n}]", lambda _: phonebook.export_csv(r.path("export.csv"), db), n, "contacts")
+        r.measure(f"phonebook.export_json[{n}]", lambda _: phonebook.export_json(r.path("export.json"), db), n, "contacts")
+        r.measure(f"phonebook.list[{n}]", lambda _: phonebook.list_contacts(db), n, "contacts")
+        os.remove(csv_path)
+        os.remove(json_path)
+
+
+def bench_expenses(r: Runner, scale: dict):
+    import expenses
+    db = r.path("expenses.db")
+
+    def setup():
+        expenses.init_db(fresh(db))
+
+    for n in scale["expenses_inserts"]:
+        rows = list(datagen.expenses(n, expenses.VALID_CATEGORIES))
+
+        def run(_, rows=rows):
+            for amount, category, date_str, desc in rows:
+                expenses.add_expense(amount, category, date_str, desc, db)
+
+        r.measure(f"expenses.add_expense[{n}]", run, n, "rows", setup)
+
+    for n in scale["expenses_rows"]:
+        if not any(r.wanted(f"expenses.{op}[{n}]") for op in ("fetch_by_category", "fetch_by_date", "fetch_all")):
+            continue
+        setup()
+        with contextlib.closing(sqlite3.connect(db)) as conn, conn:
+            conn.executemany(
+                "INSERT INTO expenses (amount, category, date, description) VALUES (?, ?, ?, ?)",
+                datagen.expenses(n, expenses.VALID_CATEGORIES),
+            )
+        dates = [f"2025-{m:02d}-15" for m in range(1, 13)]
+        r.measure(f"expenses.fetch_by_category[{n}]",
+                  lambda _: [expenses.fetch_by_category(c, db) for c in expenses.VALID_CATEGORIES],
+                  len(expenses.VALID_CATEGORIES), "queries")
+        r.measure(f"expenses.fetch_by_date[{n}]", lambda _: [expenses.fetch_by_date(d, db) for d in dates], len(dates), "queries")
+        r.measure(f"expenses.fetch_all[{n}]", lambda _: expenses.fetch_all(db), n, "rows")
+
+
+def bench_todo(r: Runner, scale: dict):
+    import task_cache
+    import todo
+    db = r.path("tasks.db")
+    for n in scale["tasks"]:
+        def setup():
+            todo.init_db(fresh(db))
+
+        def setup_filled(n=n):
+            setup()
+            for i in range(n):
+                todo.add_task(f"задача {i}", db)
+
+        r.measure(f"todo.add_task[{n}]", lambda _, n=n: [todo.add_task(f"задача {i}", db) for i in range(n)], n, "ops", setup)
+        r.measure(f"todo.mark_done[{n}]", lambda _, n=n: [todo.mark_done(i, db) for i in range(1, n + 1)], n, "ops", setup_filled)
+
+        # те же операции через кэш с пакетной записью; close() дописывает очередь и входит в замер
+        for durability in ("none", "journal"):
+            def run_cached(_, n=n, durability=durability):
+                with task_cache.TaskStore(db, durability, flush_interval=None) as store:
+                    for i in range(n):
+                        store.add_task(f"задача {i}")
+                    for i in range(1, n + 1):
+                        store.mark_done(i)
+
+            r.measure(f"todo.cache_{durability}[{n}]", run_cached, 2 * n, "ops", setup)
+
+
+def bench_text(r: Runner, scale: dict):
+    import text_analyzer
+    for mb in scale["text_mb"]:
+        text = datagen.text(mb * MB)
+        size = len(text.encode("utf-8"))
+        r.measure(f"text.analyze_text[{mb}MB]", lambda _: text_analyzer.analyze_text(text), size / MB, "MB")
+        for encoding in TEXT_ENCODINGS:
+            name = f"text.load_text[{mb}MB,{encoding}]"
+            if not r.wanted(name):
+                continue
+            path = r.path(f"text_{mb}_{encoding}.txt")
+            with open(path, "w", encoding=encoding) as f:
+                f.write(text)
+            r.measure(name, lambda _: text_analyzer.load_text(path), os.path.getsize(path) / MB, "MB")
+            os.remove(path)
+
+
+def bench_backup(r: Runner, scale: dict):
+    import backup
+    for tree, (n_files, file_size) in scale["backup"].items():
+        if not r.wanted(f"backup.{tree}"):
+            continue
+        src = r.path(f"tree_{tree}")
+        total = datagen.file_tree(src, n_files, file_size)
+        dest = r.path("archives")
+
+        def setup():
+            shutil.rmtree(dest, ignore_errors=True)
+
+        r.measure(f"backup.{tree}", lambda _: backup.create_backup(src, dest), n_files, "files", setup)
+        # тот же замер в МБ/с
+        files = r.results[f"backup.{tree}"]
+        r.results[f"backup.{tree}.mb"] = dict(files, work=total / MB, unit="MB", rate=total / MB / files["seconds"])
+        print(f"{f'backup.{tree}.mb':<45} {files['seconds']:>9.3f} с {total / MB / files['seconds']:>14,.1f} MB/с")
+        shutil.rmtree(src)
+        shutil.rmtree(dest, ignore_errors=True)
+
+
+SUITES = {
+    "phonebook": bench_phonebook,
+    "expenses": bench_expenses,
+    "todo": bench_todo,
+    "text": bench_text,
+    "backup": bench_backup,
+}
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Возвращает список (имя, было, стало, изменение) для замедлившихся замеров"""
+    regressions = []
+    print(f"\n{'Замер':<45} {'эталон':>14} {'сейчас':>14} {'изм.':>8}")
+    print("-" * 85)
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("rate"):
+            continue
+        change = res["rate"] / base["rate"] - 1
+        mark = " <-- регрессия" if change < -threshold else ""
+        print(f"{name:<45} {base['rate']:>14,.1f} {res['rate']:>14,.1f} {change:>+8.1%}{mark}")
+        if mark:
+            regressions.append((name, base["rate"], res["rate"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки утилит репозитория")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="запускать только замеры, в имени которых есть эта строка")
+    parser.add_argument("--output", help="файл для результатов JSON (по умолчанию results_<время>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как эталон")
+    parser.add_argument("--threshold", type=float, default=0.10, help="допустимое падение скорости (0.10 = 10%%)")
+    parser.add_argument("--workdir", help="папка для временных файлов (по умолчанию во временной)")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output or os.path.join(BENCH_DIR, f"results_{datetime.now():%Y%m%d_%H%M%S}.json"))
+    baseline_path = os.path.abspath(args.baseline)
+    workdir = tempfile.mkdtemp(prefix="bench_", dir=args.workdir)
+    cwd = os.getcwd()
+    # backup.py пишет backup.log в текущую папку
+    os.chdir(workdir)
+    runner = Runner(workdir, args.repeat, args.only)
+    try:
+        for suite in SUITES.values():
+            suite(runner, SCALES[args.scale])
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": runner.results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены в {output}")
+
+    if args.save_baseline:
+        shutil.copyfile(output, baseline_path)
+        print(f"Эталон сохранён в {baseline_path}")
+        return 0
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != args.scale:
+            print(f"Эталон снят в масштабе {baseline['meta'].get('scale')}, сравниваются только общие замеры")
+        regressions = compare(runner.results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\nРегрессий: {len(regressions)}")
+            return 1
+        print("\nРегрессий нет.")
+    else:
+        print(f"Эталона {baseline_path} нет, сравнение пропущено. Сохраните его через --save-baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
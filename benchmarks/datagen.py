@@ -0,0 +1,67 @@
+"""Генераторы синтетических данных для бенчмарков. Один и тот же seed даёт одни и те же данные."""
+import csv
+import json
+import os
+import random
+from datetime import date, timedelta
+
+FIRST_NAMES = ["Анна", "Иван", "Мария", "Пётр", "Ольга", "Сергей", "Елена", "Дмитрий", "Alice", "Bob"]
+LAST_NAMES = ["Иванов", "Петрова", "Сидоров", "Кузнецова", "Smith", "Brown", "Соколов", "Попова"]
+WORDS = [
+    "python", "данные", "файл", "анализ", "текст", "слово", "строка", "база", "запрос", "индекс",
+    "время", "память", "быстро", "медленно", "код", "функция", "модуль", "тест", "отчёт", "задача",
+]
+
+
+def contacts(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    for i in range(n):
+        name = f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {i}"
+        phone = f"+7{rnd.randint(9000000000, 9999999999)}"
+        email = f"user{i}@example.com" if rnd.random() < 0.7 else None
+        yield {"name": name, "phone": phone, "email": email}
+
+
+def write_contacts_csv(path: str, n: int, seed: int = 0):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "phone", "email"])
+        writer.writeheader()
+        writer.writerows(contacts(n, seed))
+
+
+def write_contacts_json(path: str, n: int, seed: int = 0):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(list(contacts(n, seed)), f, ensure_ascii=False)
+
+
+def expenses(n: int, categories, seed: int = 0, days: int = 365):
+    rnd = random.Random(seed)
+    start = date(2025, 1, 1)
+    for _ in range(n):
+        day = start + timedelta(days=rnd.randrange(days))
+        yield round(rnd.uniform(10, 5000), 2), rnd.choice(categories), day.isoformat(), None
+
+
+def text(size_bytes: int, seed: int = 0) -> str:
+    """Текст примерно заданного размера в UTF-8"""
+    rnd = random.Random(seed)
+    parts, size = [], 0
+    while size < size_bytes:
+        sentence = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 15))).capitalize()
+        sentence += rnd.choice([". ", "! ", "? ", ".\n"])
+        parts.append(sentence)
+        size += len(sentence.encode("utf-8"))
+    return "".join(parts)
+
+
+def file_tree(root: str, n_files: int, file_size: int, per_dir: int = 100, seed: int = 0) -> int:
+    """Создаёт n_files файлов по file_size байт, по per_dir в папке. Возвращает общий размер"""
+    rnd = random.Random(seed)
+    # половина данных случайная, половина повторяется — чтобы сжатие было реалистичным
+    block = rnd.randbytes(file_size // 2) + bytes(file_size - file_size // 2)
+    for i in range(n_files):
+        folder = os.path.join(root, f"dir{i // per_dir:05d}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"file{i:07d}.bin"), "wb") as f:
+            f.write(block)
+    return n_files * file_size
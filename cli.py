@@ -0,0 +1,361 @@
+"""Неинтерактивный запуск всех утилит репозитория.
+
+    python cli.py calc 2 + 3
+    python cli.py todo add "Купить хлеб"
+    python cli.py expenses list --category еда
+    python cli.py script commands.txt
+
+Модули проектов импортируются только при вызове своей команды,
+поэтому запуск, например, калькулятора не тянет sqlite3 и chardet.
+В режиме script все команды из файла выполняются в одном процессе,
+а каждая база открывается один раз (соединения переиспользует common/storage.py).
+"""
+import argparse
+import importlib
+import os
+import shlex
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# модули проектов импортируют общий код из папки common рядом с ними
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PROJECTS = {
+    "calculator": "project1_calculator",
+    "phonebook": "project2_phonebook",
+    "text_analyzer": "project3_text_analyzer",
+    "expenses": "project4_expenses",
+    "todo": "project5_todo",
+    "task_cache": "project5_todo",
+    "backup": "project6_backup",
+    "scanner": "project6_backup",
+}
+# переменные окружения, включающие замеры (см. common/instrument.py)
+INSTRUMENT_ENV = ("APP_METRICS", "APP_PROFILE", "APP_TRACEMALLOC")
+
+
+class Session:
+    """Загруженные модули и открытые базы на время запуска"""
+
+    def __init__(self):
+        self._ready = set()
+        self._stores = {}
+
+    def module(self, name: str):
+        path = os.path.join(ROOT, PROJECTS[name])
+        if path not in sys.path:
+            sys.path.insert(0, path)
+        return importlib.import_module(name)
+
+    def db(self, name: str, db_path=None):
+        """Модуль с базой; init_db выполняется один раз за запуск для каждой базы"""
+        mod = self.module(name)
+        key = (name, db_path)
+        if key not in self._ready:
+            mod.init_db(db_path)
+            self._ready.add(key)
+        return mod
+
+    def task_store(self, db_path=None, durability=None):
+        """Кэш задач с отложенной записью, один на базу до конца запуска.
+
+        С durability кэш открывается, если ещё не открыт; без него возвращается
+        уже открытый кэш или None — пока кэш открыт, база меняется только через него.
+        """
+        path = db_path or self.module("todo").DB_FILENAME
+        key = os.path.abspath(path)
+        store = self._stores.get(key)
+        if store is None and durability is not None:
+            store = self._stores[key] = self.module("task_cache").TaskStore(path, durability)
+        elif store is not None and durability not in (None, store.durability):
+            raise ValueError(f"Кэш задач {path} уже открыт с надёжностью {store.durability}")
+        return store
+
+    def close(self):
+        # сначала кэш задач: при закрытии он дописывает очередь в базу
+        while self._stores:
+            self._stores.popitem()[1].close()
+        # соединения держит common.storage, он загружен только если была команда с базой
+        if "common.storage" in sys.modules:
+            sys.modules["common.storage"].close_all()
+        self._ready.clear()
+
+
+# --- обработчики команд ---
+
+def cmd_calc(args, session):
+    calculator = session.module("calculator")
+    result = calculator.calculate(args.a, args.op, args.b)
+    print(f"{args.a} {args.op} {args.b} = {result}")
+
+
+def cmd_phonebook(args, session):
+    pb = session.db("phonebook", args.db)
+    action = args.action
+    if action == "add":
+        print(f"Контакт добавлен с ID = {pb.add_contact(args.name, args.phone, args.email, args.db)}")
+    elif action == "list":
+        pb.list_contacts(args.db)
+    elif action in ("show", "update", "delete"):
+        rec = pb.get_contact_by_id(args.id, args.db)
+        if not rec:
+            raise ValueError("Контакт не найден.")
+        id_, name, phone, email = rec
+        if action == "show":
+            print(f"ID: {id_}\nИмя: {name}\nТелефон: {phone}\nEmail: {email or ''}")
+        elif action == "update":
+            pb.update_contact(id_, args.name or name, args.phone or phone, args.email or email, args.db)
+            print("Контакт обновлён.")
+        else:
+            pb.delete_contact(id_, args.db)
+            print("Контакт удалён.")
+    elif action == "export-json":
+        pb.export_json(args.path, args.db)
+    elif action == "export-csv":
+        pb.export_csv(args.path, args.db)
+    elif action == "import-json":
+        pb.import_json(args.path, db_path=args.db)
+    elif action == "import-csv":
+        pb.import_csv(args.path, db_path=args.db)
+
+
+def cmd_text(args, session):
+    ta = session.module("text_analyzer")
+    stats = ta.analyze_text(ta.load_text(args.path))
+    if args.json:
+        import json
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    else:
+        ta.save_report(args.report, stats)
+
+
+def cmd_expenses(args, session):
+    ex = session.db("expenses", args.db)
+    if args.action == "add":
+        date_str = args.date or ex.datetime.now().strftime("%Y-%m-%d")
+        ex.add_expense(args.amount, args.category, date_str, args.description, args.db)
+        print("Запись добавлена.")
+    elif args.action == "list":
+        if args.date:
+            rows = ex.fetch_by_date(args.date, args.db)
+        elif args.category:
+            rows = ex.fetch_by_category(args.category, args.db)
+        else:
+            rows = ex.fetch_all(args.db)
+        ex.print_rows(rows)
+    elif args.action == "export":
+        count = ex.export_csv(args.path, args.db)
+        print(f"Экспортировано {count} записей в {args.path}")
+
+
+def cmd_todo(args, session):
+    todo = session.db("todo", args.db)
+    store = session.task_store(args.db, args.durability if args.cache else None)
+    if args.action == "add":
+        desc = " ".join(args.description).strip()
+        if not desc:
+            raise ValueError("Описание не может быть пустым.")
+        if store is not None:
+            store.add_task(desc)
+        else:
+            todo.add_task(desc, args.db)
+        print("Задача добавлена.")
+    elif args.action in ("done", "delete"):
+        if store is not None:
+            tasks = {task_id: store.get(task_id) for task_id in args.ids}
+            missing = [task_id for task_id, task in tasks.items() if task is None]
+            # как mark_done_many: уже выполненные задачи не считаются
+            ids = [task_id for task_id, task in tasks.items() if task and not (args.action == "done" and task[3])]
+            apply = store.mark_done if args.action == "done" else store.delete_task
+            for task_id in ids:
+                apply(task_id)
+            count = len(ids)
+        else:
+            missing = todo.missing_ids(args.ids, args.db)
+            bulk = todo.mark_done_many if args.action == "done" else todo.delete_many
+            count = bulk(args.ids, args.db)
+        print(f"{'Отмечено выполненными' if args.action == 'done' else 'Удалено задач'}: {count}")
+        if missing:
+            # как прежние mark_done/delete_task: неизвестный ID — ошибка и код 1
+            raise ValueError(f"Задача с таким ID не найдена: {', '.join(map(str, missing))}")
+    elif args.action == "list":
+        if store is not None:
+            # фильтры и страницы считает SQLite, поэтому сначала дописываем очередь
+            store.flush()
+        done = True if args.done else False if args.open else None
+        tasks = todo.fetch_tasks(done, args.created_from, args.created_to, args.prefix,
+                                 args.after_id, args.limit, args.db)
+        todo.print_tasks(tasks)
+
+
+def cmd_backup(args, session):
+    session.module("backup").create_backup(args.src, args.dest)
+
+
+def cmd_scan(args, session):
+    scanner = session.module("scanner")
+    result = scanner.scan(args.root, args.index, args.workers or scanner.WORKERS, verify=args.verify)
+    scanner.print_result(result)
+
+
+def cmd_script(args, session):
+    parser = build_parser()
+    batch = Session()
+    failed = 0
+    try:
+        with open(args.path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    sub = parser.parse_args(shlex.split(line))
+                    if sub.func is cmd_script:
+                        raise ValueError("Вложенный script не поддерживается")
+                    sub.func(sub, batch)
+                except SystemExit:
+                    # argparse уже напечатал, что не так с командой
+                    failed += 1
+                    print(f"Ошибка в строке {lineno}: неверная команда", file=sys.stderr)
+                    if args.stop_on_error:
+                        break
+                except Exception as e:
+                    failed += 1
+                    print(f"Ошибка в строке {lineno}: {e}", file=sys.stderr)
+                    if args.stop_on_error:
+                        break
+    finally:
+        batch.close()
+    if failed:
+        raise SystemExit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Утилиты курса Python без интерактивного меню")
+    parser.add_argument("--metrics", metavar="PATH", help="сохранить замеры времени и счётчики (- — в stderr)")
+    parser.add_argument("--metrics-format", choices=("json", "prom"), help="json (по умолчанию) или prom")
+    parser.add_argument("--slow-query-ms", type=float, help="порог медленного SQL-запроса (по умолчанию 100)")
+    parser.add_argument("--profile", metavar="DIR", help="сохранить профиль cProfile команды в папку")
+    parser.add_argument("--tracemalloc", action="store_true", help="замерить выделения памяти командой (без --metrics — в stderr)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("calc", help="калькулятор: calc 2 + 3")
+    p.add_argument("a", type=float)
+    p.add_argument("op", help="+ - * / ^ %% //")
+    p.add_argument("b", type=float)
+    p.set_defaults(func=cmd_calc)
+
+    p = sub.add_parser("phonebook", help="телефонная книга")
+    p.add_argument("--db", help="файл базы (по умолчанию phonebook.db)")
+    actions = p.add_subparsers(dest="action", required=True)
+    a = actions.add_parser("add")
+    a.add_argument("name")
+    a.add_argument("phone")
+    a.add_argument("--email")
+    actions.add_parser("list")
+    for name in ("show", "delete"):
+        actions.add_parser(name).add_argument("id", type=int)
+    a = actions.add_parser("update")
+    a.add_argument("id", type=int)
+    a.add_argument("--name")
+    a.add_argument("--phone")
+    a.add_argument("--email")
+    for name in ("export-json", "export-csv", "import-json", "import-csv"):
+        actions.add_parser(name).add_argument("path")
+    p.set_defaults(func=cmd_phonebook)
+
+    p = sub.add_parser("text", help="анализ текстового файла")
+    p.add_argument("path")
+    p.add_argument("--report", default="report.txt")
+    p.add_argument("--json", action="store_true", help="вывести статистику в JSON вместо отчёта")
+    p.set_defaults(func=cmd_text)
+
+    p = sub.add_parser("expenses", help="дневник расходов")
+    p.add_argument("--db", help="файл базы (по умолчанию expenses.db)")
+    actions = p.add_subparsers(dest="action", required=True)
+    a = actions.add_parser("add")
+    a.add_argument("amount", type=float)
+    a.add_argument("category")
+    a.add_argument("--date", help="ГГГГ-ММ-ДД, по умолчанию сегодня")
+    a.add_argument("--description")
+    a = actions.add_parser("list")
+    group = a.add_mutually_exclusive_group()
+    group.add_argument("--date")
+    group.add_argument("--category")
+    actions.add_parser("export").add_argument("path")
+    p.set_defaults(func=cmd_expenses)
+
+    p = sub.add_parser("todo", help="менеджер задач")
+    p.add_argument("--db", help="файл базы (по умолчанию tasks.db)")
+    p.add_argument("--cache", action="store_true",
+                   help="изменения через кэш в памяти с пакетной записью (быстрее в режиме script); "
+                        "до конца запуска через него идут и остальные команды с этой базой")
+    p.add_argument("--durability", choices=("none", "journal", "fsync", "sync"), default="journal",
+                   help="надёжность кэша задач, см. project5_todo/task_cache.py")
+    actions = p.add_subparsers(dest="action", required=True)
+    actions.add_parser("add").add_argument("description", nargs="+")
+    for name in ("done", "delete"):
+        actions.add_parser(name).add_argument("ids", type=int, nargs="+")
+    a = actions.add_parser("list")
+    group = a.add_mutually_exclusive_group()
+    group.add_argument("--open", action="store_true")
+    group.add_argument("--done", action="store_true")
+    a.add_argument("--created-from")
+    a.add_argument("--created-to")
+    a.add_argument("--prefix")
+    a.add_argument("--after-id", type=int)
+    a.add_argument("--limit", type=int, default=50)
+    p.set_defaults(func=cmd_todo)
+
+    p = sub.add_parser("backup", help="резервная копия папки в ZIP")
+    p.add_argument("src")
+    p.add_argument("dest")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("scan", help="что изменилось в папке с прошлого сканирования")
+    p.add_argument("root")
+    p.add_argument("--index", default="file_index.db", help="файл индекса хешей")
+    p.add_argument("--workers", type=int, help="потоков хеширования")
+    p.add_argument("--verify", action="store_true", help="перехешировать все файлы")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("script", help="выполнить команды из файла, по одной на строку")
+    p.add_argument("path")
+    p.add_argument("--stop-on-error", action="store_true")
+    p.set_defaults(func=cmd_script)
+
+    return parser
+
+
+def run_command(args, session):
+    """Выполняет команду; при включённых замерах — внутри instrument.profile"""
+    flags = args.metrics or args.profile or args.tracemalloc or args.metrics_format or args.slow_query_ms is not None
+    if not flags and not any(os.environ.get(name) for name in INSTRUMENT_ENV):
+        args.func(args, session)
+        return
+    from common import instrument
+    if flags:
+        # флаги дополняют настройки из APP_* (см. common/instrument.py), а не заменяют их
+        instrument.enable_from_env(output=args.metrics, fmt=args.metrics_format, slow_query_ms=args.slow_query_ms,
+                                   profile_dir=args.profile, trace_memory=args.tracemalloc)
+    with instrument.profile(f"cli.{args.command}"):
+        args.func(args, session)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    session = Session()
+    try:
+        run_command(args, session)
+    except Exception as e:
+        # как в режиме script: любая ошибка команды — сообщение и код 1, без трассировки
+        print("Ошибка:", e, file=sys.stderr)
+        return 1
+    finally:
+        session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Общий код для утилит репозитория"""
@@ -0,0 +1,328 @@
+"""Необязательные замеры времени, счётчики и профилирование.
+
+Включается переменными окружения или вызовом enable():
+
+    APP_METRICS=metrics.json      куда сохранить результаты при выходе ("-" — в stderr)
+    APP_METRICS_FORMAT=prom       json (по умолчанию) или prom (текстовый формат Prometheus)
+    APP_SLOW_QUERY_MS=50          порог медленного SQL-запроса для лога, мс
+    APP_PROFILE=profiles          папка для файлов cProfile (.prof) каждой команды
+    APP_TRACEMALLOC=1             снимать пик и топ выделений памяти каждой команды (без APP_METRICS — в stderr)
+
+Профиль и память снимаются внутри profile(): им обёрнута каждая команда cli.py
+и main() каждой утилиты при запуске файла напрямую.
+
+Пока замеры выключены, timed() возвращает пустой контекст, а common/storage.py
+открывает соединения без connection_class(), так что накладные расходы почти нулевые.
+"""
+import atexit
+import contextlib
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from typing import Optional
+
+ENV_OUTPUT = "APP_METRICS"
+ENV_FORMAT = "APP_METRICS_FORMAT"
+ENV_SLOW_QUERY_MS = "APP_SLOW_QUERY_MS"
+ENV_PROFILE = "APP_PROFILE"
+ENV_TRACEMALLOC = "APP_TRACEMALLOC"
+FORMATS = ("json", "prom")
+SLOW_QUERY_MS = 100.0
+SQL_KEY_LENGTH = 80
+
+LOGGER_NAME = "instrument"
+enabled = False
+_options = {"output": None, "format": "json", "slow_query_ms": SLOW_QUERY_MS, "profile_dir": None, "tracemalloc": False}
+_lock = threading.Lock()
+_timers = {}  # имя -> [количество, сумма секунд, максимум]
+_counters = {}
+_memory = {}
+_profiles = {}
+_NOOP = contextlib.nullcontext()
+_atexit_registered = False
+
+
+def enable(output: Optional[str] = None, fmt: str = "json", slow_query_ms: float = SLOW_QUERY_MS,
+           profile_dir: Optional[str] = None, trace_memory: bool = False):
+    """Включает замеры; если задан output, результаты сохраняются туда при выходе.
+
+    Замеры памяти без output иначе никуда не попадут, поэтому тогда они пишутся в stderr.
+    """
+    global enabled, _atexit_registered
+    if fmt not in FORMATS:
+        raise ValueError(f"Неверный формат метрик. Доступные: {', '.join(FORMATS)}")
+    if trace_memory and not output:
+        output = "-"
+    _options.update(output=output, format=fmt, slow_query_ms=slow_query_ms,
+                    profile_dir=profile_dir, tracemalloc=trace_memory)
+    enabled = True
+    if output and not _atexit_registered:
+        atexit.register(_dump_at_exit)
+        _atexit_registered = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _memory.clear()
+        _profiles.clear()
+
+
+def env_options() -> dict:
+    """Настройки из переменных окружения в виде аргументов enable()"""
+    return {
+        "output": os.environ.get(ENV_OUTPUT) or None,
+        "fmt": os.environ.get(ENV_FORMAT, "json"),
+        "slow_query_ms": float(os.environ.get(ENV_SLOW_QUERY_MS, SLOW_QUERY_MS)),
+        "profile_dir": os.environ.get(ENV_PROFILE) or None,
+        "trace_memory": os.environ.get(ENV_TRACEMALLOC, "") not in ("", "0"),
+    }
+
+
+def enable_from_env(**overrides):
+    """Включает замеры по переменным окружения.
+
+    overrides — аргументы enable(), например флаги командной строки; None и False
+    не заменяют значения из окружения, а дополняют их.
+    """
+    options = env_options()
+    options.update((name, value) for name, value in overrides.items() if value not in (None, False))
+    if not (options["output"] or options["profile_dir"] or options["trace_memory"]):
+        return
+    enable(**options)
+
+
+# --- таймеры и счётчики ---
+
+def record(name: str, seconds: float):
+    with _lock:
+        t = _timers.get(name)
+        if t is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            if seconds > t[2]:
+                t[2] = seconds
+
+
+def count(name: str, n: int = 1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def add_bytes_read(n: int):
+    count("bytes_read", n)
+
+
+def add_bytes_written(n: int):
+    count("bytes_written", n)
+
+
+@contextlib.contextmanager
+def _timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Контекст, замеряющий время блока под именем name"""
+    if not enabled:
+        return _NOOP
+    return _timed(name)
+
+
+def timeit(func=None, *, name: Optional[str] = None):
+    """Декоратор: замеряет каждый вызов функции (имя по умолчанию — модуль.функция)"""
+    if func is None:
+        return functools.partial(timeit, name=name)
+    key = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(key, time.perf_counter() - start)
+
+    return wrapper
+
+
+# --- SQLite ---
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _sql_key(sql: str) -> str:
+    return "sql:" + _SPACES_RE.sub(" ", sql).strip()[:SQL_KEY_LENGTH]
+
+
+_connection_class = None
+
+
+def connection_class():
+    """Класс соединения с замерами; sqlite3 импортируется только при первом обращении"""
+    global _connection_class
+    if _connection_class is not None:
+        return _connection_class
+    import sqlite3
+
+    class InstrumentedConnection(sqlite3.Connection):
+        """Соединение, замеряющее каждый запрос и пишущее медленные в лог"""
+
+        def _timed_call(self, method, sql, *args):
+            if not enabled:
+                return method(self, sql, *args)
+            start = time.perf_counter()
+            try:
+                return method(self, sql, *args)
+            finally:
+                elapsed = time.perf_counter() - start
+                record(_sql_key(sql), elapsed)
+                if elapsed * 1000 >= _options["slow_query_ms"]:
+                    import logging
+                    count("slow_queries")
+                    logging.getLogger(LOGGER_NAME).warning("Медленный запрос (%.1f мс): %s", elapsed * 1000, _SPACES_RE.sub(" ", sql).strip())
+
+        def execute(self, sql, *args):
+            return self._timed_call(sqlite3.Connection.execute, sql, *args)
+
+        def executemany(self, sql, *args):
+            return self._timed_call(sqlite3.Connection.executemany, sql, *args)
+
+        def executescript(self, sql):
+            return self._timed_call(sqlite3.Connection.executescript, sql)
+
+        def commit(self):
+            if not enabled:
+                return super().commit()
+            with _timed("sql:COMMIT"):
+                return super().commit()
+
+    _connection_class = InstrumentedConnection
+    return _connection_class
+
+
+# --- профилирование ---
+
+@contextlib.contextmanager
+def _profile(name: str):
+    profiler = None
+    if _options["profile_dir"]:
+        import cProfile
+        profiler = cProfile.Profile()
+    if _options["tracemalloc"]:
+        import tracemalloc
+        tracemalloc.start()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        record(name, time.perf_counter() - start)
+        if profiler is not None:
+            os.makedirs(_options["profile_dir"], exist_ok=True)
+            path = os.path.join(_options["profile_dir"], f"{name}_{os.getpid()}_{int(time.time())}.prof")
+            profiler.dump_stats(path)
+            with _lock:
+                _profiles[name] = path
+        if _options["tracemalloc"]:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:10]
+            tracemalloc.stop()
+            with _lock:
+                _memory[name] = {
+                    "current_bytes": current,
+                    "peak_bytes": peak,
+                    "top": [{"where": str(s.traceback), "bytes": s.size, "count": s.count} for s in top],
+                }
+
+
+def profile(name: str):
+    """Замер команды целиком; при включённых опциях — cProfile и tracemalloc вокруг блока"""
+    if not enabled:
+        return _NOOP
+    return _profile(name)
+
+
+# --- выгрузка ---
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "timers": {
+                name: {"count": c, "total_seconds": total, "avg_seconds": total / c, "max_seconds": mx}
+                for name, (c, total, mx) in sorted(_timers.items())
+            },
+            "counters": dict(sorted(_counters.items())),
+            "memory": dict(_memory),
+            "profiles": dict(_profiles),
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def to_prometheus(data: Optional[dict] = None) -> str:
+    data = data or snapshot()
+    lines = [
+        "# HELP app_operation_seconds Время операций и SQL-запросов",
+        "# TYPE app_operation_seconds summary",
+    ]
+    for name, t in data["timers"].items():
+        lines.append(f'app_operation_seconds_count{{op="{_label(name)}"}} {t["count"]}')
+        lines.append(f'app_operation_seconds_sum{{op="{_label(name)}"}} {t["total_seconds"]:.9f}')
+    lines.append("# TYPE app_operation_seconds_max gauge")
+    for name, t in data["timers"].items():
+        lines.append(f'app_operation_seconds_max{{op="{_label(name)}"}} {t["max_seconds"]:.9f}')
+    lines.append("# TYPE app_events_total counter")
+    for name, value in data["counters"].items():
+        lines.append(f'app_events_total{{name="{_label(name)}"}} {value}')
+    lines.append("# TYPE app_memory_peak_bytes gauge")
+    for name, m in data["memory"].items():
+        lines.append(f'app_memory_peak_bytes{{op="{_label(name)}"}} {m["peak_bytes"]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: Optional[str] = None, fmt: Optional[str] = None):
+    """Сохраняет метрики в файл (или в stderr, если path == "-")"""
+    fmt = fmt or _options["format"]
+    data = snapshot()
+    import json
+    text = to_prometheus(data) if fmt == "prom" else json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+    path = path or _options["output"] or "-"
+    if path == "-":
+        sys.stderr.write(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _dump_at_exit():
+    if enabled and _options["output"]:
+        dump()
+
+
+enable_from_env()
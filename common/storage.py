@@ -0,0 +1,156 @@
+"""Общий слой SQLite для телефонной книги, расходов и задач.
+
+    conn = storage.connect("tasks.db")      # одно соединение на файл и поток
+    storage.migrate(conn, MIGRATIONS)       # схема и индексы по PRAGMA user_version
+    with storage.transaction(conn):         # много записей — один коммит
+        ...
+
+Прагмы по умолчанию — в PRAGMAS; их можно поменять через configure() или
+переменную окружения APP_SQLITE_PRAGMAS="synchronous=FULL,cache_size=-64000".
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+
+from common import instrument
+
+ENV_PRAGMAS = "APP_SQLITE_PRAGMAS"
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # в режиме WAL безопасно, не делает fsync на каждый коммит
+    "cache_size": -16000,  # отрицательное значение — в КиБ, т.е. 16 МБ
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+_local = threading.local()
+_classes = {}
+
+
+def configure(**pragmas):
+    """Меняет прагмы для новых соединений"""
+    PRAGMAS.update(pragmas)
+
+
+def _pragmas_from_env():
+    value = os.environ.get(ENV_PRAGMAS, "")
+    for item in value.split(","):
+        if "=" in item:
+            name, val = item.split("=", 1)
+            PRAGMAS[name.strip()] = val.strip()
+
+
+def _connection_class(base):
+    cls = _classes.get(base)
+    if cls is not None:
+        return cls
+
+    class StorageConnection(base):
+        """Соединение, в котором commit() внутри transaction() откладывается до её конца"""
+
+        tx_depth = 0
+
+        def commit(self):
+            if self.tx_depth:
+                return
+            super().commit()
+
+        def __exit__(self, exc_type, exc, tb):
+            if self.tx_depth:
+                # фиксацией или откатом управляет transaction()
+                return False
+            return super().__exit__(exc_type, exc, tb)
+
+    _classes[base] = cls = StorageConnection
+    return cls
+
+
+def open_connection(path: str, **kwargs):
+    """Новое соединение с настроенными прагмами (без повторного использования).
+
+    Нужно там, где соединение передаётся между потоками: kwargs идут в sqlite3.connect.
+    """
+    base = instrument.connection_class() if instrument.enabled else sqlite3.Connection
+    kwargs.setdefault("cached_statements", STATEMENT_CACHE_SIZE)
+    conn = sqlite3.connect(path, factory=_connection_class(base), **kwargs)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def connect(path: str):
+    """Соединение с базой path, общее для всех вызовов в текущем потоке"""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    key = path if path == ":memory:" else os.path.abspath(path)
+    conn = conns.get(key)
+    if conn is None:
+        conn = conns[key] = open_connection(path)
+    return conn
+
+
+def close(path: str):
+    """Закрывает общее соединение с базой path в текущем потоке"""
+    conns = getattr(_local, "conns", {})
+    key = path if path == ":memory:" else os.path.abspath(path)
+    conn = conns.pop(key, None)
+    if conn is not None:
+        conn.commit()
+        conn.close()
+
+
+def close_all():
+    for path in list(getattr(_local, "conns", {})):
+        close(path)
+
+
+@contextlib.contextmanager
+def transaction(conn):
+    """Выполняет блок одной транзакцией; вложенные блоки становятся точками сохранения"""
+    depth = conn.tx_depth
+    if depth == 0:
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+    else:
+        conn.execute(f"SAVEPOINT tx{depth}")
+    conn.tx_depth = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        conn.tx_depth = depth
+        if depth == 0:
+            conn.rollback()
+        else:
+            conn.execute(f"ROLLBACK TO tx{depth}")
+            conn.execute(f"RELEASE tx{depth}")
+        raise
+    conn.tx_depth = depth
+    if depth == 0:
+        conn.commit()
+    else:
+        conn.execute(f"RELEASE tx{depth}")
+
+
+def migrate(conn, migrations) -> int:
+    """Применяет недостающие миграции и возвращает версию схемы.
+
+    migrations — список миграций, каждая — список SQL-операторов; номер
+    версии равен позиции миграции в списке, начиная с 1.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, statements in enumerate(migrations[version:], version + 1):
+        with transaction(conn):
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {number}")
+        version = number
+    return version
+
+
+_pragmas_from_env()
@@ -1,3 +1,21 @@
+OPERATIONS = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+    "^": lambda a, b: a ** b,
+    "%": lambda a, b: a % b,
+    "//": lambda a, b: a // b,
+}
+
+
+def calculate(a: float, op: str, b: float) -> float:
+    """Вычисляет a op b для операций из OPERATIONS"""
+    if op not in OPERATIONS:
+        raise ValueError(f"Неизвестная операция: {op}. Доступные: {' '.join(OPERATIONS)}")
+    return OPERATIONS[op](a, b)
+
+
 def show_menu():
     print("\n===== Калькулятор =====")
     print("1. Сложение")
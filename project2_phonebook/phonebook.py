@@ -1,32 +1,43 @@
-import sqlite3
 import csv
 import json
 import os
 import re
+import sys
 from typing import Optional
 
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument, storage  # noqa: E402
+
 DB_FILENAME = "phonebook.db"
 
 EMAIL_RE = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
 
 
-def get_conn():
-    return sqlite3.connect(DB_FILENAME)
+MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            email TEXT
+        )
+        """,
+    ],
+    [
+        # сортировка списка по имени и поиск дубликатов при импорте
+        "CREATE INDEX IF NOT EXISTS idx_contacts_name_phone ON contacts(name, phone)",
+    ],
+]
+
 
+def get_conn(db_path: Optional[str] = None):
+    return storage.connect(db_path or DB_FILENAME)
 
-def init_db():
-    with get_conn() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS contacts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                email TEXT
-            )
-            """
-        )
-        conn.commit()
+
+def init_db(db_path: Optional[str] = None):
+    storage.migrate(get_conn(db_path), MIGRATIONS)
 
 
 def validate_email(email: Optional[str]) -> Optional[str]:
@@ -38,21 +49,54 @@ def validate_email(email: Optional[str]) -> Optional[str]:
     return email
 
 
-def add_contact(name: str, phone: str, email: Optional[str] = None) -> int:
+# --- операции над открытым соединением (их же использует project7_service) ---
+
+def insert_contact(conn, name: str, phone: str, email: Optional[str] = None) -> int:
     email = validate_email(email)
-    with get_conn() as conn:
-        cur = conn.execute(
-            "INSERT INTO contacts (name, phone, email) VALUES (?, ?, ?)",
-            (name.strip(), phone.strip(), email),
-        )
+    cur = conn.execute(
+        "INSERT INTO contacts (name, phone, email) VALUES (?, ?, ?)",
+        (name.strip(), phone.strip(), email),
+    )
+    return cur.lastrowid
+
+
+def select_contacts(conn, limit: Optional[int] = None):
+    return conn.execute(
+        "SELECT id, name, phone, email FROM contacts ORDER BY name LIMIT ?", (-1 if limit is None else limit,)
+    ).fetchall()
+
+
+def select_contact(conn, contact_id: int):
+    return conn.execute("SELECT id, name, phone, email FROM contacts WHERE id = ?", (contact_id,)).fetchone()
+
+
+def update_contact_row(conn, contact_id: int, name: str, phone: str, email: Optional[str]) -> bool:
+    """Возвращает False, если контакта с таким ID нет"""
+    email = validate_email(email)
+    cur = conn.execute(
+        "UPDATE contacts SET name = ?, phone = ?, email = ? WHERE id = ?",
+        (name.strip(), phone.strip(), email, contact_id),
+    )
+    return cur.rowcount > 0
+
+
+def delete_contact_row(conn, contact_id: int) -> bool:
+    """Возвращает False, если контакта с таким ID нет"""
+    return conn.execute("DELETE FROM contacts WHERE id = ?", (contact_id,)).rowcount > 0
+
+
+@instrument.timeit
+def add_contact(name: str, phone: str, email: Optional[str] = None, db_path: Optional[str] = None) -> int:
+    with get_conn(db_path) as conn:
+        contact_id = insert_contact(conn, name, phone, email)
         conn.commit()
-        return cur.lastrowid
+        return contact_id
 
 
-def list_contacts():
-    with get_conn() as conn:
-        cur = conn.execute("SELECT id, name, phone, email FROM contacts ORDER BY name")
-        rows = cur.fetchall()
+@instrument.timeit
+def list_contacts(db_path: Optional[str] = None):
+    with get_conn(db_path) as conn:
+        rows = select_contacts(conn)
     if not rows:
         print("Контакты отсутствуют.")
         return
@@ -64,30 +108,29 @@ def list_contacts():
     print()
 
 
-def get_contact_by_id(contact_id: int):
-    with get_conn() as conn:
-        cur = conn.execute("SELECT id, name, phone, email FROM contacts WHERE id = ?", (contact_id,))
-        return cur.fetchone()
+@instrument.timeit
+def get_contact_by_id(contact_id: int, db_path: Optional[str] = None):
+    with get_conn(db_path) as conn:
+        return select_contact(conn, contact_id)
 
 
-def update_contact(contact_id: int, name: str, phone: str, email: Optional[str]):
-    email = validate_email(email)
-    with get_conn() as conn:
-        conn.execute(
-            "UPDATE contacts SET name = ?, phone = ?, email = ? WHERE id = ?",
-            (name.strip(), phone.strip(), email, contact_id),
-        )
+@instrument.timeit
+def update_contact(contact_id: int, name: str, phone: str, email: Optional[str], db_path: Optional[str] = None):
+    with get_conn(db_path) as conn:
+        update_contact_row(conn, contact_id, name, phone, email)
         conn.commit()
 
 
-def delete_contact(contact_id: int):
-    with get_conn() as conn:
-        conn.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
+@instrument.timeit
+def delete_contact(contact_id: int, db_path: Optional[str] = None):
+    with get_conn(db_path) as conn:
+        delete_contact_row(conn, contact_id)
         conn.commit()
 
 
-def export_json(filepath: str):
-    with get_conn() as conn:
+@instrument.timeit
+def export_json(filepath: str, db_path: Optional[str] = None):
+    with get_conn(db_path) as conn:
         cur = conn.execute("SELECT id, name, phone, email FROM contacts ORDER BY id")
         rows = cur.fetchall()
     data = []
@@ -96,11 +139,14 @@ def export_json(filepath: str):
         data.append({"id": id_, "name": name, "phone": phone, "email": email})
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    if instrument.enabled:
+        instrument.add_bytes_written(os.path.getsize(filepath))
     print(f"Экспортировано {len(data)} контактов в {filepath}")
 
 
-def export_csv(filepath: str):
-    with get_conn() as conn:
+@instrument.timeit
+def export_csv(filepath: str, db_path: Optional[str] = None):
+    with get_conn(db_path) as conn:
         cur = conn.execute("SELECT id, name, phone, email FROM contacts ORDER BY id")
         rows = cur.fetchall()
     with open(filepath, "w", newline="", encoding="utf-8") as f:
@@ -108,17 +154,22 @@ def export_csv(filepath: str):
         writer.writerow(["id", "name", "phone", "email"])
         for r in rows:
             writer.writerow(r)
+    if instrument.enabled:
+        instrument.add_bytes_written(os.path.getsize(filepath))
     print(f"Экспортировано {len(rows)} контактов в {filepath}")
 
 
-def import_json(filepath: str, skip_duplicates: bool = True):
+@instrument.timeit
+def import_json(filepath: str, skip_duplicates: bool = True, db_path: Optional[str] = None):
     if not os.path.exists(filepath):
         print("Файл не найден.")
         return
+    if instrument.enabled:
+        instrument.add_bytes_read(os.path.getsize(filepath))
     with open(filepath, "r", encoding="utf-8") as f:
         data = json.load(f)
     added = 0
-    with get_conn() as conn:
+    with get_conn(db_path) as conn:
         for item in data:
             name = item.get("name")
             phone = item.get("phone")
@@ -142,14 +193,17 @@ def import_json(filepath: str, skip_duplicates: bool = True):
     print(f"Импортировано {added} контактов из {filepath}")
 
 
-def import_csv(filepath: str, skip_duplicates: bool = True):
+@instrument.timeit
+def import_csv(filepath: str, skip_duplicates: bool = True, db_path: Optional[str] = None):
     if not os.path.exists(filepath):
         print("Файл не найден.")
         return
+    if instrument.enabled:
+        instrument.add_bytes_read(os.path.getsize(filepath))
     added = 0
     with open(filepath, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        with get_conn() as conn:
+        with get_conn(db_path) as conn:
             for row in reader:
                 name = row.get("name") or row.get("Имя") or row.get("Name")
                 phone = row.get("phone") or row.get("Телефон") or row.get("Phone")
@@ -197,8 +251,8 @@ def main_menu():
 """)
 
 
-def main():
-    init_db()
+def main(db_path: Optional[str] = None):
+    init_db(db_path)
     while True:
         main_menu()
         choice = input("Выберите пункт: ").strip()
@@ -208,20 +262,20 @@ def main():
                 phone = prompt_non_empty("Телефон")
                 email = input("Email (необязательно): ").strip() or None
                 try:
-                    cid = add_contact(name, phone, email)
+                    cid = add_contact(name, phone, email, db_path)
                     print(f"Контакт добавлен с ID = {cid}")
                 except ValueError as e:
                     print("Ошибка:", e)
 
             elif choice == "2":
-                list_contacts()
+                list_contacts(db_path)
 
             elif choice == "3":
                 cid = input("Введите ID контакта: ").strip()
                 if not cid.isdigit():
                     print("Неверный ID")
                     continue
-                rec = get_contact_by_id(int(cid))
+                rec = get_contact_by_id(int(cid), db_path)
                 if not rec:
                     print("Контакт не найден.")
                 else:
@@ -233,7 +287,7 @@ def main():
                 if not cid.isdigit():
                     print("Неверный ID")
                     continue
-                rec = get_contact_by_id(int(cid))
+                rec = get_contact_by_id(int(cid), db_path)
                 if not rec:
                     print("Контакт не найден.")
                     continue
@@ -243,7 +297,7 @@ def main():
                 new_phone = input(f"Телефон [{phone}]: ").strip() or phone
                 new_email = input(f"Email [{email or ''}]: ").strip() or email
                 try:
-                    update_contact(id_, new_name, new_phone, new_email)
+                    update_contact(id_, new_name, new_phone, new_email, db_path)
                     print("Контакт обновлён.")
                 except ValueError as e:
                     print("Ошибка:", e)
@@ -253,38 +307,38 @@ def main():
                 if not cid.isdigit():
                     print("Неверный ID")
                     continue
-                rec = get_contact_by_id(int(cid))
+                rec = get_contact_by_id(int(cid), db_path)
                 if not rec:
                     print("Контакт не найден.")
                     continue
                 confirm = input(f"Удалить контакт {rec[1]} (ID={rec[0]})? (y/N): ").strip().lower()
                 if confirm == "y":
-                    delete_contact(int(cid))
+                    delete_contact(int(cid), db_path)
                     print("Контакт удалён.")
                 else:
                     print("Отмена.")
 
             elif choice == "6":
                 path = input("Путь для JSON (по умолчанию phonebook_export.json): ").strip() or "phonebook_export.json"
-                export_json(path)
+                export_json(path, db_path=db_path)
 
             elif choice == "7":
                 path = input("Путь для CSV (по умолчанию phonebook_export.csv): ").strip() or "phonebook_export.csv"
-                export_csv(path)
+                export_csv(path, db_path=db_path)
 
             elif choice == "8":
                 path = input("Путь JSON для импорта: ").strip()
                 if path == "":
                     print("Путь не указан.")
                 else:
-                    import_json(path)
+                    import_json(path, db_path=db_path)
 
             elif choice == "9":
                 path = input("Путь CSV для импорта: ").strip()
                 if path == "":
                     print("Путь не указан.")
                 else:
-                    import_csv(path)
+                    import_csv(path, db_path=db_path)
 
             elif choice == "0":
                 print("Выход...")
@@ -298,4 +352,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with instrument.profile("phonebook.main"):
+        main()
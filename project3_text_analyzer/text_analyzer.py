@@ -1,23 +1,36 @@
-import chardet
+import os
 import re
+import sys
 from collections import Counter
 
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument  # noqa: E402
+
+@instrument.timeit
 def detect_encoding(filepath: str) -> str:
     """Определяет кодировку файла"""
+    import chardet  # тяжёлый импорт, нужен только здесь
+
     with open(filepath, "rb") as f:
         raw_data = f.read(100000)  # читаем кусок файла
     result = chardet.detect(raw_data)
     return result["encoding"] or "utf-8"
 
+@instrument.timeit
 def load_text(filepath: str) -> str:
     """Загружает текст с правильной кодировкой"""
     encoding = detect_encoding(filepath)
     try:
         with open(filepath, "r", encoding=encoding) as f:
-            return f.read()
+            text = f.read()
     except Exception as e:
         raise RuntimeError(f"Ошибка при чтении файла: {e}")
+    if instrument.enabled:
+        instrument.add_bytes_read(os.path.getsize(filepath))
+    return text
 
+@instrument.timeit
 def analyze_text(text: str) -> dict:
     """Выполняет анализ текста"""
     # Убираем двойные пробелы и лишние символы
@@ -77,4 +90,5 @@ def main():
         print("Ошибка:", e)
 
 if __name__ == "__main__":
-    main()
+    with instrument.profile("text_analyzer.main"):
+        main()
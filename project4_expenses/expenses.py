@@ -1,33 +1,42 @@
-import sqlite3
 import csv
 import os
+import sys
 from datetime import datetime
 from typing import Optional
 
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument, storage  # noqa: E402
+
 DB_FILENAME = "expenses.db"
 VALID_CATEGORIES = ["еда", "транспорт", "развлечения", "прочее"]  # можно расширять
 
 
+MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            date TEXT NOT NULL, -- YYYY-MM-DD
+            description TEXT
+        )
+        """,
+    ],
+    [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses(category, date)",
+    ],
+]
+
+
 def get_conn(db_path: Optional[str] = None):
-    if db_path:
-        return sqlite3.connect(db_path)
-    return sqlite3.connect(DB_FILENAME)
+    return storage.connect(db_path or DB_FILENAME)
 
 
 def init_db(db_path: Optional[str] = None):
-    with get_conn(db_path) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                date TEXT NOT NULL, -- YYYY-MM-DD
-                description TEXT
-            )
-            """
-        )
-        conn.commit()
+    storage.migrate(get_conn(db_path), MIGRATIONS)
 
 
 def validate_date(date_str: str) -> str:
@@ -38,6 +47,7 @@ def validate_date(date_str: str) -> str:
         raise ValueError("Неверный формат даты. Ожидается ГГГГ-ММ-ДД")
 
 
+@instrument.timeit
 def add_expense(amount: float, category: str, date_str: str, description: Optional[str] = None, db_path: Optional[str] = None):
     if category not in VALID_CATEGORIES:
         raise ValueError(f"Неверная категория. Доступные: {', '.join(VALID_CATEGORIES)}")
@@ -50,17 +60,20 @@ def add_expense(amount: float, category: str, date_str: str, description: Option
         conn.commit()
 
 
+@instrument.timeit
 def fetch_all(db_path: Optional[str] = None):
     with get_conn(db_path) as conn:
         return conn.execute("SELECT id, amount, category, date, description FROM expenses ORDER BY date DESC, id DESC").fetchall()
 
 
+@instrument.timeit
 def fetch_by_date(date_str: str, db_path: Optional[str] = None):
     date_norm = validate_date(date_str)
     with get_conn(db_path) as conn:
         return conn.execute("SELECT id, amount, category, date, description FROM expenses WHERE date = ? ORDER BY id DESC", (date_norm,)).fetchall()
 
 
+@instrument.timeit
 def fetch_by_category(category: str, db_path: Optional[str] = None):
     if category not in VALID_CATEGORIES:
         raise ValueError(f"Неверная категория. Доступные: {', '.join(VALID_CATEGORIES)}")
@@ -68,6 +81,7 @@ def fetch_by_category(category: str, db_path: Optional[str] = None):
         return conn.execute("SELECT id, amount, category, date, description FROM expenses WHERE category = ? ORDER BY date DESC, id DESC", (category,)).fetchall()
 
 
+@instrument.timeit
 def export_csv(filepath: str, db_path: Optional[str] = None):
     rows = fetch_all(db_path)
     with open(filepath, "w", newline="", encoding="utf-8") as f:
@@ -75,6 +89,8 @@ def export_csv(filepath: str, db_path: Optional[str] = None):
         writer.writerow(["id", "amount", "category", "date", "description"])
         for r in rows:
             writer.writerow(r)
+    if instrument.enabled:
+        instrument.add_bytes_written(os.path.getsize(filepath))
     return len(rows)
 
 
@@ -179,4 +195,5 @@ def main(db_path: Optional[str] = None):
 
 
 if __name__ == "__main__":
-    main()
+    with instrument.profile("expenses.main"):
+        main()
@@ -0,0 +1,261 @@
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument  # noqa: E402
+from expenses import DB_FILENAME, VALID_CATEGORIES, get_conn  # noqa: E402
+
+CHUNK_SIZE = 50000
+SNAPSHOT_SUFFIX = "_snapshot"  # снимок базы expenses.db лежит в expenses_snapshot/
+COLUMNS = ("id", "amount", "day", "category")
+META_FILENAME = "meta.json"
+
+
+class ExpenseColumns:
+    """Таблица expenses в виде колонок NumPy.
+
+    day — число дней с 1970-01-01, category — индекс в списке categories.
+    """
+
+    def __init__(self, id_, amount, day, category, categories):
+        self.id = id_
+        self.amount = amount
+        self.day = day
+        self.category = category
+        self.categories = list(categories)
+
+    def __len__(self):
+        return len(self.id)
+
+    def category_code(self, category: str) -> int:
+        if category not in self.categories:
+            raise ValueError(f"Неверная категория. Доступные: {', '.join(self.categories)}")
+        return self.categories.index(category)
+
+    def mask(self, category: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None):
+        """Булева маска строк по категории и диапазону дат (включительно)"""
+        m = np.ones(len(self), dtype=bool)
+        if category is not None:
+            m &= self.category == self.category_code(category)
+        if date_from is not None:
+            m &= self.day >= to_day(date_from)
+        if date_to is not None:
+            m &= self.day <= to_day(date_to)
+        return m
+
+    def total_by_category(self, mask=None) -> dict:
+        amount, category = self._select(mask, self.amount, self.category)
+        sums = np.bincount(category, weights=amount, minlength=len(self.categories))
+        return {name: float(sums[i]) for i, name in enumerate(self.categories)}
+
+    def count_by_category(self, mask=None) -> dict:
+        (category,) = self._select(mask, self.category)
+        counts = np.bincount(category, minlength=len(self.categories))
+        return {name: int(counts[i]) for i, name in enumerate(self.categories)}
+
+    def total_by_day(self, mask=None):
+        """Возвращает (дни, суммы) только для дней, в которые были траты"""
+        amount, day = self._select(mask, self.amount, self.day)
+        days, inverse = np.unique(day, return_inverse=True)
+        sums = np.bincount(inverse, weights=amount, minlength=len(days))
+        return days, sums
+
+    def daily_series(self, mask=None):
+        """Суммы по дням без пропусков: (первый день, массив сумм)"""
+        amount, day = self._select(mask, self.amount, self.day)
+        if len(day) == 0:
+            return None, np.zeros(0)
+        first = int(day.min())
+        sums = np.bincount(day - first, weights=amount)
+        return first, sums
+
+    def rolling_sum(self, window: int, mask=None):
+        """Скользящая сумма по дням за последние window дней"""
+        if window < 1:
+            raise ValueError("Окно должно быть не меньше 1 дня")
+        first, sums = self.daily_series(mask)
+        if first is None:
+            return np.zeros(0, dtype="datetime64[D]"), sums
+        csum = np.cumsum(sums)
+        rolled = csum.copy()
+        rolled[window:] = csum[window:] - csum[:-window]
+        days = np.arange(first, first + len(sums)).astype("datetime64[D]")
+        return days, rolled
+
+    def rolling_mean(self, window: int, mask=None):
+        days, rolled = self.rolling_sum(window, mask)
+        counts = np.minimum(np.arange(1, len(rolled) + 1), window)
+        return days, rolled / counts
+
+    def percentiles(self, q=(50, 90, 99), mask=None) -> dict:
+        (amount,) = self._select(mask, self.amount)
+        if len(amount) == 0:
+            return {p: None for p in q}
+        values = np.percentile(amount, q)
+        return {p: float(v) for p, v in zip(q, values)}
+
+    def anomalies(self, threshold: float = 3.0, mask=None):
+        """Маска трат, отличающихся от среднего по своей категории больше чем на threshold σ"""
+        n = len(self.categories)
+        counts = np.bincount(self.category, minlength=n)
+        sums = np.bincount(self.category, weights=self.amount, minlength=n)
+        sq_sums = np.bincount(self.category, weights=self.amount * self.amount, minlength=n)
+        safe = np.maximum(counts, 1)
+        mean = sums / safe
+        std = np.sqrt(np.maximum(sq_sums / safe - mean * mean, 0.0))
+        row_std = std[self.category]
+        flags = np.zeros(len(self), dtype=bool)
+        nonzero = row_std > 0
+        z = np.abs(self.amount[nonzero] - mean[self.category[nonzero]]) / row_std[nonzero]
+        flags[nonzero] = z > threshold
+        if mask is not None:
+            flags &= mask
+        return flags
+
+    def rows(self, mask):
+        """Строки по маске в виде (id, amount, category, date) для печати"""
+        idx = np.nonzero(mask)[0]
+        dates = self.day[idx].astype("datetime64[D]").astype(str)
+        return [
+            (int(self.id[i]), float(self.amount[i]), self.categories[self.category[i]], d)
+            for i, d in zip(idx, dates)
+        ]
+
+    @staticmethod
+    def _select(mask, *columns):
+        if mask is None:
+            return columns
+        return tuple(c[mask] for c in columns)
+
+
+def to_day(date_str: str) -> int:
+    datetime.strptime(date_str, "%Y-%m-%d")
+    return int(np.datetime64(date_str, "D").astype(np.int64))
+
+
+def _db_signature(conn) -> dict:
+    rows, max_id = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM expenses").fetchone()
+    return {"rows": rows, "max_id": max_id}
+
+
+def load_from_db(db_path: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> ExpenseColumns:
+    """Читает таблицу expenses порциями по chunk_size строк"""
+    categories = list(VALID_CATEGORIES)
+    codes = {name: i for i, name in enumerate(categories)}
+    with get_conn(db_path) as conn:
+        # одна транзакция, чтобы COUNT и SELECT видели одни и те же данные
+        conn.execute("BEGIN")
+        total = _db_signature(conn)["rows"]
+        id_ = np.empty(total, dtype=np.int64)
+        amount = np.empty(total, dtype=np.float64)
+        day = np.empty(total, dtype=np.int32)
+        category = np.empty(total, dtype=np.int16)
+        cur = conn.execute("SELECT id, amount, category, date FROM expenses ORDER BY id")
+        pos = 0
+        while True:
+            chunk = cur.fetchmany(chunk_size)
+            if not chunk:
+                break
+            ids, amounts, cats, dates = zip(*chunk)
+            end = pos + len(chunk)
+            id_[pos:end] = ids
+            amount[pos:end] = amounts
+            day[pos:end] = np.array(dates, dtype="datetime64[D]").astype(np.int64)
+            for i, c in enumerate(cats, pos):
+                code = codes.get(c)
+                if code is None:
+                    code = codes[c] = len(categories)
+                    categories.append(c)
+                category[i] = code
+            pos = end
+        conn.rollback()
+    return ExpenseColumns(id_, amount, day, category, categories)
+
+
+def snapshot_dir_for(db_path: Optional[str] = None) -> str:
+    return os.path.splitext(db_path or DB_FILENAME)[0] + SNAPSHOT_SUFFIX
+
+
+def save_snapshot(cols: ExpenseColumns, snapshot_dir: str, signature: Optional[dict] = None):
+    """Сохраняет колонки в .npy; meta.json пишется последним, поэтому недописанный снимок не используется.
+
+    Файлы пишутся под временными именами и подменяются через os.replace, так что
+    сессия, которая держит старый снимок через mmap, продолжает читать целые данные.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for name in COLUMNS:
+        path = os.path.join(snapshot_dir, f"{name}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, getattr(cols, name))
+        os.replace(path + ".tmp", path)
+    meta = {"categories": cols.categories, **(signature or {})}
+    meta_path = os.path.join(snapshot_dir, META_FILENAME)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def load_snapshot(snapshot_dir: str, mmap: bool = True):
+    """Загружает снимок (по умолчанию через mmap). Возвращает (колонки, meta) или None"""
+    meta_path = os.path.join(snapshot_dir, META_FILENAME)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    arrays = [np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode=mode) for name in COLUMNS]
+    return ExpenseColumns(*arrays, meta["categories"]), meta
+
+
+def load(db_path: Optional[str] = None, snapshot_dir: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> ExpenseColumns:
+    """Берёт колонки из снимка, если он совпадает с базой, иначе читает базу и обновляет снимок.
+
+    Дневник только добавляет записи, поэтому путь к базе, число строк и
+    максимальный id однозначно определяют, устарел ли снимок.
+    """
+    snapshot_dir = snapshot_dir or snapshot_dir_for(db_path)
+    with get_conn(db_path) as conn:
+        signature = {"db_path": os.path.abspath(db_path or DB_FILENAME), **_db_signature(conn)}
+    loaded = load_snapshot(snapshot_dir)
+    if loaded is not None:
+        cols, meta = loaded
+        if all(meta.get(key) == value for key, value in signature.items()):
+            return cols
+    cols = load_from_db(db_path, chunk_size)
+    signature.update(rows=len(cols), max_id=int(cols.id.max()) if len(cols) else 0)
+    save_snapshot(cols, snapshot_dir, signature)
+    return cols
+
+
+def print_summary(cols: ExpenseColumns):
+    print(f"\nЗаписей: {len(cols)}")
+    totals = cols.total_by_category()
+    counts = cols.count_by_category()
+    print(f"\n{'Категория':<15} {'Кол-во':<8} Сумма")
+    print("-" * 40)
+    for name in cols.categories:
+        print(f"{name:<15} {counts[name]:<8} {totals[name]:.2f}")
+    print("\nПерцентили суммы:")
+    for p, v in cols.percentiles().items():
+        print(f" - p{p}: {v:.2f}" if v is not None else f" - p{p}: -")
+    flagged = cols.rows(cols.anomalies())
+    print(f"\nАномальных трат: {len(flagged)}")
+    for id_, amount, category, date in flagged[:10]:
+        print(f"{id_:<6} {amount:<10.2f} {category:<15} {date}")
+    print()
+
+
+def main(db_path: Optional[str] = None, snapshot_dir: Optional[str] = None):
+    print_summary(load(db_path, snapshot_dir))
+
+
+if __name__ == "__main__":
+    with instrument.profile("expenses_analytics.main"):
+        main()
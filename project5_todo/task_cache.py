@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+from todo import DB_FILENAME, init_db, storage
+
+FLUSH_INTERVAL = 1.0  # секунды между фоновыми сбросами в базу
+FLUSH_THRESHOLD = 1000  # сброс сразу, если накопилось столько операций
+
+# none    — операции только в памяти до сброса, при падении теряются
+# journal — каждая операция дописывается в журнал (переживает падение процесса)
+# fsync   — журнал + fsync после каждой операции (переживает отключение питания)
+# sync    — каждая операция сразу коммитится в SQLite, как в todo.py
+DURABILITY_LEVELS = ("none", "journal", "fsync", "sync")
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRecord:
+    __slots__ = ("id", "description", "created_at", "done")
+
+    def __init__(self, id_: int, description: str, created_at: str, done: int = 0):
+        self.id = id_
+        self.description = description
+        self.created_at = created_at
+        self.done = done
+
+    def as_row(self):
+        return self.id, self.description, self.created_at, self.done
+
+
+class TaskStore:
+    """Кэш задач в памяти с отложенной пакетной записью в SQLite.
+
+    Чтение идёт из памяти, изменения копятся и записываются одной транзакцией
+    по таймеру или по порогу. Пока хранилище открыто, база должна
+    изменяться только через него.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, durability: str = "journal",
+                 flush_interval: Optional[float] = FLUSH_INTERVAL, flush_threshold: int = FLUSH_THRESHOLD,
+                 journal_path: Optional[str] = None):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Неверный уровень надёжности. Доступные: {', '.join(DURABILITY_LEVELS)}")
+        self.db_path = db_path or DB_FILENAME
+        self.durability = durability
+        self.flush_threshold = flush_threshold
+        self.journal_path = journal_path or self.db_path + ".journal"
+
+        self._lock = threading.RLock()
+        self._pending = []
+        self._by_id = {}
+        self._open_ids = set()
+        self._done_ids = set()
+
+        init_db(self.db_path)
+        # соединение общее для вызывающего потока и фонового сброса, доступ под self._lock
+        self._conn = storage.open_connection(self.db_path, check_same_thread=False)
+        self._recover()
+        self._load()
+        self._journal = open(self.journal_path, "a", encoding="utf-8") if durability in ("journal", "fsync") else None
+
+        self._stop = threading.Event()
+        self._flusher = None
+        if flush_interval and durability != "sync":
+            self._flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,), daemon=True)
+            self._flusher.start()
+
+    # --- восстановление и загрузка ---
+
+    def _recover(self):
+        """Применяет операции из журнала, не попавшие в базу до падения"""
+        if not os.path.exists(self.journal_path):
+            return
+        ops = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    # последняя строка могла быть дописана не полностью
+                    break
+        if ops:
+            self._apply(ops)
+        os.remove(self.journal_path)
+
+    def _load(self):
+        rows = self._conn.execute("SELECT id, description, created_at, done FROM tasks ORDER BY id").fetchall()
+        for row in rows:
+            self._index(TaskRecord(*row))
+        seq = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+        self._next_id = max(seq[0] if seq else 0, rows[-1][0] if rows else 0) + 1
+
+    def _index(self, task: TaskRecord):
+        self._by_id[task.id] = task
+        (self._done_ids if task.done else self._open_ids).add(task.id)
+
+    # --- запись ---
+
+    def _apply(self, ops):
+        """Записывает операции в базу одной транзакцией. Повторное применение безопасно"""
+        with self._conn:
+            for op in ops:
+                kind = op[0]
+                if kind == "add":
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tasks (id, description, created_at, done) VALUES (?, ?, ?, 0)",
+                        op[1:],
+                    )
+                elif kind == "done":
+                    self._conn.execute("UPDATE tasks SET done = 1 WHERE id = ?", (op[1],))
+                elif kind == "delete":
+                    self._conn.execute("DELETE FROM tasks WHERE id = ?", (op[1],))
+
+    def _record(self, op):
+        if self.durability == "sync":
+            self._apply([op])
+            return
+        if self._journal is not None:
+            self._journal.write(json.dumps(op, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            if self.durability == "fsync":
+                os.fsync(self._journal.fileno())
+        self._pending.append(op)
+        if len(self._pending) >= self.flush_threshold:
+            try:
+                self.flush()
+            except Exception:
+                # операция уже принята и останется в очереди до следующего сброса
+                logger.exception("Не удалось сбросить задачи в базу")
+
+    def flush(self) -> int:
+        """Записывает накопленные операции в базу. Возвращает их число.
+
+        Если запись не удалась, операции и журнал остаются как были.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            ops = self._pending
+            self._apply(ops)
+            # очередь и журнал очищаются только после успешного коммита
+            self._pending = []
+            if self._journal is not None:
+                self._journal.seek(0)
+                self._journal.truncate()
+            return len(ops)
+
+    def _flush_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Не удалось сбросить задачи в базу, повтор через %s с", interval)
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            os.remove(self.journal_path)
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- операции, как в todo.py ---
+
+    def add_task(self, description: str) -> int:
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            task = TaskRecord(self._next_id, description, created_at)
+            self._next_id += 1
+            self._index(task)
+            self._record(("add", task.id, description, created_at))
+            return task.id
+
+    def mark_done(self, task_id: int):
+        with self._lock:
+            task = self._by_id.get(task_id)
+            if task is None:
+                raise ValueError("Задача с таким ID не найдена")
+            if task.done:
+                return
+            task.done = 1
+            self._open_ids.discard(task_id)
+            self._done_ids.add(task_id)
+            self._record(("done", task_id))
+
+    def delete_task(self, task_id: int):
+        with self._lock:
+            task = self._by_id.pop(task_id, None)
+            if task is None:
+                raise ValueError("Задача с таким ID не найдена")
+            (self._done_ids if task.done else self._open_ids).discard(task_id)
+            self._record(("delete", task_id))
+
+    def get(self, task_id: int):
+        task = self._by_id.get(task_id)
+        return task.as_row() if task else None
+
+    def fetch_all(self):
+        with self._lock:
+            return [self._by_id[i].as_row() for i in reversed(self._by_id)]
+
+    def fetch(self, done: Optional[bool] = None):
+        if done is None:
+            return self.fetch_all()
+        with self._lock:
+            ids = sorted(self._done_ids if done else self._open_ids, reverse=True)
+            return [self._by_id[i].as_row() for i in ids]
+
+    def __len__(self):
+        return len(self._by_id)
@@ -1,57 +1,105 @@
-import sqlite3
+import os
+import sys
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument, storage  # noqa: E402
 
 DB_FILENAME = "tasks.db"
+PAGE_SIZE = 50
+# ограничение на число параметров в одном запросе SQLite
+MAX_IDS_PER_QUERY = 500
+
+
+MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            description TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ],
+    [
+        # частичный индекс только по открытым задачам: он маленький и
+        # используется запросами с условием done = 0
+        "CREATE INDEX IF NOT EXISTS idx_tasks_open ON tasks(id) WHERE done = 0",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at)",
+    ],
+]
 
 
 def get_conn(db_path: Optional[str] = None):
-    if db_path:
-        return sqlite3.connect(db_path)
-    return sqlite3.connect(DB_FILENAME)
+    return storage.connect(db_path or DB_FILENAME)
 
 
 def init_db(db_path: Optional[str] = None):
-    with get_conn(db_path) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                description TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                done INTEGER NOT NULL DEFAULT 0
-            )
-            """
-        )
-        conn.commit()
+    storage.migrate(get_conn(db_path), MIGRATIONS)
 
 
-def add_task(description: str, db_path: Optional[str] = None):
+# --- операции над открытым соединением (их же использует project7_service) ---
+
+def insert_task(conn, description: str) -> int:
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cur = conn.execute(
+        "INSERT INTO tasks (description, created_at, done) VALUES (?, ?, ?)",
+        (description, created_at, 0),
+    )
+    return cur.lastrowid
+
+
+def set_done(conn, task_id: int):
+    cur = conn.execute("UPDATE tasks SET done = 1 WHERE id = ?", (task_id,))
+    if cur.rowcount == 0:
+        raise ValueError("Задача с таким ID не найдена")
+
+
+def remove_task(conn, task_id: int):
+    cur = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+    if cur.rowcount == 0:
+        raise ValueError("Задача с таким ID не найдена")
+
+
+def select_tasks(conn, done: Optional[bool] = None, created_from: Optional[str] = None,
+                 created_to: Optional[str] = None, prefix: Optional[str] = None,
+                 after_id: Optional[int] = None, limit: int = PAGE_SIZE):
+    clauses, params = _build_filter(done, created_from, created_to, prefix)
+    if after_id is not None:
+        clauses.append("id < ?")
+        params.append(after_id)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return conn.execute(
+        f"SELECT id, description, created_at, done FROM tasks {where} ORDER BY id DESC LIMIT ?",
+        (*params, limit),
+    ).fetchall()
+
+
+@instrument.timeit
+def add_task(description: str, db_path: Optional[str] = None):
     with get_conn(db_path) as conn:
-        conn.execute(
-            "INSERT INTO tasks (description, created_at, done) VALUES (?, ?, ?)",
-            (description, created_at, 0),
-        )
+        insert_task(conn, description)
         conn.commit()
 
 
+@instrument.timeit
 def mark_done(task_id: int, db_path: Optional[str] = None):
     with get_conn(db_path) as conn:
-        cur = conn.execute("UPDATE tasks SET done = 1 WHERE id = ?", (task_id,))
-        if cur.rowcount == 0:
-            raise ValueError("Задача с таким ID не найдена")
+        set_done(conn, task_id)
         conn.commit()
 
 
+@instrument.timeit
 def delete_task(task_id: int, db_path: Optional[str] = None):
     with get_conn(db_path) as conn:
-        cur = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        if cur.rowcount == 0:
-            raise ValueError("Задача с таким ID не найдена")
+        remove_task(conn, task_id)
         conn.commit()
 
 
+@instrument.timeit
 def fetch_all(db_path: Optional[str] = None):
     with get_conn(db_path) as conn:
         return conn.execute(
@@ -59,6 +107,108 @@ def fetch_all(db_path: Optional[str] = None):
         ).fetchall()
 
 
+def _build_filter(done: Optional[bool] = None, created_from: Optional[str] = None,
+                  created_to: Optional[str] = None, prefix: Optional[str] = None):
+    """Собирает условие WHERE и параметры для фильтра задач"""
+    clauses, params = [], []
+    if done is not None:
+        # литерал вместо параметра, иначе SQLite не применит частичный индекс
+        clauses.append("done = 1" if done else "done = 0")
+    if created_from:
+        clauses.append("created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        # дата без времени включает весь день
+        clauses.append("created_at <= ?")
+        params.append(created_to + " 23:59:59" if len(created_to) == 10 else created_to)
+    if prefix:
+        # диапазон вместо LIKE: учитывает регистр и не требует экранирования % и _
+        clauses.append("description >= ? AND description < ?")
+        params.extend([prefix, prefix + "\U0010ffff"])
+    return clauses, params
+
+
+@instrument.timeit
+def fetch_tasks(done: Optional[bool] = None, created_from: Optional[str] = None,
+                created_to: Optional[str] = None, prefix: Optional[str] = None,
+                after_id: Optional[int] = None, limit: int = PAGE_SIZE, db_path: Optional[str] = None):
+    """Страница задач по фильтру, от новых к старым.
+
+    Для следующей страницы передайте after_id = ID последней задачи предыдущей.
+    """
+    with get_conn(db_path) as conn:
+        return select_tasks(conn, done, created_from, created_to, prefix, after_id, limit)
+
+
+def iter_tasks(page_size: int = PAGE_SIZE, db_path: Optional[str] = None, **filters):
+    """Перебирает все задачи по фильтру постранично"""
+    after_id = None
+    while True:
+        page = fetch_tasks(after_id=after_id, limit=page_size, db_path=db_path, **filters)
+        yield from page
+        if len(page) < page_size:
+            return
+        after_id = page[-1][0]
+
+
+def _bulk(sql: str, task_ids: Optional[Iterable[int]], filters: dict, db_path: Optional[str],
+          done: Optional[bool] = None) -> int:
+    """done добавляется к фильтру вызывающего, но сам по себе фильтром не считается"""
+    clauses, params = _build_filter(**filters)
+    if task_ids is None and not clauses:
+        raise ValueError("Не указаны ни ID задач, ни фильтр")
+    if done is not None:
+        clauses.extend(_build_filter(done=done)[0])
+    changed = 0
+    with get_conn(db_path) as conn:
+        if task_ids is None:
+            changed = conn.execute(f"{sql} WHERE {' AND '.join(clauses)}", params).rowcount
+        else:
+            ids = list(task_ids)
+            for i in range(0, len(ids), MAX_IDS_PER_QUERY):
+                chunk = ids[i:i + MAX_IDS_PER_QUERY]
+                where = " AND ".join([f"id IN ({', '.join('?' * len(chunk))})", *clauses])
+                changed += conn.execute(f"{sql} WHERE {where}", (*chunk, *params)).rowcount
+        conn.commit()
+    return changed
+
+
+def missing_ids(task_ids: Iterable[int], db_path: Optional[str] = None) -> list:
+    """ID из списка, которых нет в базе, в исходном порядке"""
+    ids = list(dict.fromkeys(task_ids))
+    found = set()
+    with get_conn(db_path) as conn:
+        for i in range(0, len(ids), MAX_IDS_PER_QUERY):
+            chunk = ids[i:i + MAX_IDS_PER_QUERY]
+            found.update(row[0] for row in conn.execute(
+                f"SELECT id FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+    return [task_id for task_id in ids if task_id not in found]
+
+
+@instrument.timeit
+def mark_done_many(task_ids: Optional[Iterable[int]] = None, db_path: Optional[str] = None, **filters) -> int:
+    """Отмечает выполненными задачи по списку ID и/или фильтру одной транзакцией.
+
+    Возвращает число изменённых задач.
+    """
+    filters.pop("done", None)
+    return _bulk("UPDATE tasks SET done = 1", task_ids, filters, db_path, done=False)
+
+
+@instrument.timeit
+def delete_many(task_ids: Optional[Iterable[int]] = None, db_path: Optional[str] = None, **filters) -> int:
+    """Удаляет задачи по списку ID и/или фильтру одной транзакцией.
+
+    Возвращает число удалённых задач.
+    """
+    return _bulk("DELETE FROM tasks", task_ids, filters, db_path)
+
+
+def parse_ids(s: str):
+    return [int(x) for x in s.replace(",", " ").split()]
+
+
 def print_tasks(tasks):
     if not tasks:
         print("Список задач пуст.")
@@ -79,6 +229,9 @@ def main_menu():
 2. Отметить задачу как выполненную
 3. Удалить задачу
 4. Показать все задачи
+5. Найти задачи (фильтр)
+6. Отметить несколько задач выполненными
+7. Удалить несколько задач
 0. Выход
 """)
 
@@ -111,6 +264,38 @@ def main(db_path: Optional[str] = None):
                 tasks = fetch_all(db_path)
                 print_tasks(tasks)
 
+            elif choice == "5":
+                status = input("Статус (open/done, пусто — все): ").strip().lower()
+                done = {"open": False, "done": True}.get(status)
+                created_from = input("Создана с (ГГГГ-ММ-ДД, необязательно): ").strip() or None
+                created_to = input("Создана по (ГГГГ-ММ-ДД, необязательно): ").strip() or None
+                prefix = input("Описание начинается с (необязательно): ").strip() or None
+                after_id = None
+                while True:
+                    tasks = fetch_tasks(done, created_from, created_to, prefix, after_id, db_path=db_path)
+                    print_tasks(tasks)
+                    if len(tasks) < PAGE_SIZE:
+                        break
+                    if input("Следующая страница? (Y/n): ").strip().lower() == "n":
+                        break
+                    after_id = tasks[-1][0]
+
+            elif choice == "6":
+                ids = parse_ids(input("Введите ID задач через пробел или запятую: "))
+                missing = missing_ids(ids, db_path)
+                count = mark_done_many(ids, db_path)
+                print(f"Отмечено выполненными: {count}")
+                if missing:
+                    print("Не найдены задачи с ID:", ", ".join(map(str, missing)))
+
+            elif choice == "7":
+                ids = parse_ids(input("Введите ID задач через пробел или запятую: "))
+                missing = missing_ids(ids, db_path)
+                count = delete_many(ids, db_path)
+                print(f"Удалено задач: {count}")
+                if missing:
+                    print("Не найдены задачи с ID:", ", ".join(map(str, missing)))
+
             elif choice == "0":
                 print("Выход.")
                 break
@@ -122,4 +307,5 @@ def main(db_path: Optional[str] = None):
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with instrument.profile("todo.main"):
+        main()
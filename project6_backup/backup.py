@@ -4,6 +4,11 @@ from datetime import datetime
 import logging
 import sys
 
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument  # noqa: E402
+from walk import scan_tree  # noqa: E402
+
 # Настройка логирования
 logging.basicConfig(
     filename="backup.log",
@@ -13,6 +18,7 @@ logging.basicConfig(
 )
 
 
+@instrument.timeit
 def create_backup(src_folder: str, dest_folder: str):
     """Создание ZIP-архива с резервной копией"""
 
@@ -35,15 +41,18 @@ def create_backup(src_folder: str, dest_folder: str):
 
     try:
         with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(src_folder):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, src_folder)
-                    try:
+            for file_path, rel_path, st in scan_tree(src_folder):
+                try:
+                    with instrument.timed("backup.zip_write"):
                         zipf.write(file_path, rel_path)
-                        logging.info(f"Добавлен файл: {file_path} → {rel_path}")
-                    except Exception as e:
-                        logging.error(f"Ошибка при добавлении файла {file_path}: {e}")
+                    if instrument.enabled:
+                        instrument.count("backup.files")
+                        instrument.add_bytes_read(st.st_size)
+                    logging.info(f"Добавлен файл: {file_path} → {rel_path}")
+                except Exception as e:
+                    logging.error(f"Ошибка при добавлении файла {file_path}: {e}")
+        if instrument.enabled:
+            instrument.add_bytes_written(os.path.getsize(archive_path))
         logging.info(f"Архив успешно создан: {archive_path}")
         print(f"✅ Резервная копия создана: {archive_path}")
     except Exception as e:
@@ -62,4 +71,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with instrument.profile("backup.main"):
+        main()
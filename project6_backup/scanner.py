@@ -0,0 +1,224 @@
+"""Поиск изменений в больших деревьях файлов с хешированием и индексом в SQLite.
+
+    python scanner.py /data                 # что изменилось с прошлого запуска
+    python scanner.py /data --verify        # перехешировать всё, даже без изменений по stat
+
+Файл считается неизменным, если совпали размер, mtime, inode и алгоритм хеша с прошлым
+сканированием, — такие файлы не читаются. Остальные хешируются в пуле потоков
+(hashlib отпускает GIL), большие — через mmap крупными блоками.
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument, storage  # noqa: E402
+from walk import scan_tree  # noqa: E402
+
+INDEX_FILENAME = "file_index.db"
+ALGORITHM = "blake2b"
+BLOCK_SIZE = 8 * 1024 * 1024
+MMAP_THRESHOLD = 1024 * 1024  # файлы меньше читаются целиком обычным read
+ALGORITHMS = ("blake2b", "blake2s", "md5", "sha1", "sha256", "sha512")
+BATCH_SIZE = 1000  # файлов на одну пачку хеширования и одну транзакцию
+WORKERS = min(32, (os.cpu_count() or 1) * 2)
+# файл, изменённый меньше чем за столько до начала сканирования, мог ещё
+# меняться в ту же единицу mtime — такие перепроверяются в следующий раз
+RACY_WINDOW_NS = 2 * 10**9
+
+MIGRATIONS = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS files (
+            root TEXT NOT NULL,
+            rel_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (root, rel_path)
+        ) WITHOUT ROWID
+        """,
+    ],
+    [
+        # хеши разных алгоритмов несравнимы; старые строки посчитаны алгоритмом по умолчанию
+        "ALTER TABLE files ADD COLUMN algorithm TEXT NOT NULL DEFAULT 'blake2b'",
+    ],
+]
+
+
+class ScanResult:
+    __slots__ = ("added", "modified", "deleted", "unchanged", "touched", "bytes_hashed", "errors", "seconds")
+
+    def __init__(self):
+        self.added = []
+        self.modified = []
+        self.deleted = []
+        self.unchanged = 0
+        self.touched = 0  # изменился stat, но не содержимое
+        self.bytes_hashed = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+
+def hash_file(path: str, algorithm: str = ALGORITHM) -> str:
+    return _hash_file(path, (algorithm,))[0]
+
+
+def _hash_file(path: str, algorithms) -> list:
+    """Хеши файла несколькими алгоритмами за одно чтение"""
+    hashes = [hashlib.new(a) for a in algorithms]
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            data = f.read()
+            for h in hashes:
+                h.update(data)
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, size, BLOCK_SIZE):
+                        with view[offset:offset + BLOCK_SIZE] as block:
+                            for h in hashes:
+                                h.update(block)
+                finally:
+                    view.release()
+    return [h.hexdigest() for h in hashes]
+
+
+def init_index(index_path: str = INDEX_FILENAME):
+    conn = storage.connect(index_path)
+    storage.migrate(conn, MIGRATIONS)
+    return conn
+
+
+@instrument.timeit
+def scan(root: str, index_path: str = INDEX_FILENAME, workers: int = WORKERS,
+         algorithm: str = ALGORITHM, verify: bool = False) -> ScanResult:
+    """Сравнивает дерево root с индексом, обновляет индекс и возвращает изменения"""
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"Папка не найдена: {root}")
+    root = os.path.abspath(root)
+    started = time.perf_counter()
+    scan_start_ns = time.time_ns()
+    conn = init_index(index_path)
+    known = {
+        rel: (size, mtime_ns, inode, digest, algo)
+        for rel, size, mtime_ns, inode, digest, algo in conn.execute(
+            "SELECT rel_path, size, mtime_ns, inode, hash, algorithm FROM files WHERE root = ?", (root,)
+        )
+    }
+    result = ScanResult()
+
+    def hash_one(item):
+        path, rel, st = item
+        old = known.get(rel)
+        # при смене алгоритма файл хешируется и старым, чтобы сравнить с индексом
+        algorithms = (algorithm, old[4]) if old is not None and old[4] != algorithm else (algorithm,)
+        try:
+            return item, _hash_file(path, algorithms), None
+        except OSError as e:
+            return item, None, e
+
+    def process(batch, pool):
+        rows = []
+        for (path, rel, st), digests, error in pool.map(hash_one, batch):
+            if error is not None:
+                result.errors.append((rel, str(error)))
+                continue
+            result.bytes_hashed += st.st_size
+            old = known.get(rel)
+            if old is None:
+                result.added.append(rel)
+            elif old[3] != digests[-1]:
+                result.modified.append(rel)
+            else:
+                result.touched += 1
+            mtime_ns = st.st_mtime_ns if scan_start_ns - st.st_mtime_ns > RACY_WINDOW_NS else 0
+            rows.append((root, rel, st.st_size, mtime_ns, st.st_ino, digests[0], algorithm))
+        with storage.transaction(conn):
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (root, rel_path, size, mtime_ns, inode, hash, algorithm) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    seen = set()
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for path, rel, st in scan_tree(root, failed):
+            seen.add(rel)
+            old = known.get(rel)
+            if not verify and old is not None and old[:3] == (st.st_size, st.st_mtime_ns, st.st_ino) \
+                    and old[4] == algorithm:
+                result.unchanged += 1
+                continue
+            batch.append((path, rel, st))
+            if len(batch) >= BATCH_SIZE:
+                process(batch, pool)
+                batch = []
+        if batch:
+            process(batch, pool)
+
+    # то, что не удалось прочитать, не считается удалённым: строки индекса под этими путями остаются
+    result.errors.extend((rel or ".", str(e)) for rel, e in failed)
+    unreadable = [rel for rel, _ in failed]
+
+    def unreadable_path(rel):
+        return any(p == "" or rel == p or rel.startswith(p + os.sep) for p in unreadable)
+
+    result.deleted = [rel for rel in known if rel not in seen and not unreadable_path(rel)]
+    with storage.transaction(conn):
+        conn.executemany("DELETE FROM files WHERE root = ? AND rel_path = ?", ((root, rel) for rel in result.deleted))
+    if instrument.enabled:
+        instrument.add_bytes_read(result.bytes_hashed)
+        instrument.count("scanner.files_hashed", len(result.added) + len(result.modified) + result.touched)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def print_result(result: ScanResult, limit: int = 20):
+    for title, items in (("Добавлено", result.added), ("Изменено", result.modified), ("Удалено", result.deleted)):
+        print(f"{title}: {len(items)}")
+        for rel in sorted(items)[:limit]:
+            print(f"  {rel}")
+        if len(items) > limit:
+            print(f"  ... и ещё {len(items) - limit}")
+    print(f"Без изменений: {result.unchanged + result.touched}")
+    for rel, error in result.errors[:limit]:
+        print(f"Ошибка чтения {rel}: {error}")
+    mb = result.bytes_hashed / (1024 * 1024)
+    print(f"Прочитано {mb:.1f} МБ за {result.seconds:.2f} с")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Поиск изменённых файлов с индексом хешей")
+    parser.add_argument("root")
+    parser.add_argument("--index", default=INDEX_FILENAME, help="файл индекса SQLite")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--algorithm", default=ALGORITHM, choices=ALGORITHMS)
+    parser.add_argument("--verify", action="store_true", help="перехешировать все файлы")
+    args = parser.parse_args(argv)
+    try:
+        print_result(scan(args.root, args.index, args.workers, args.algorithm, args.verify))
+    except Exception as e:
+        print("Ошибка:", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    with instrument.profile("scanner.main"):
+        sys.exit(main())
@@ -0,0 +1,33 @@
+"""Обход дерева файлов без тяжёлых зависимостей: его используют и backup.py, и scanner.py."""
+import os
+from typing import Optional
+
+
+def scan_tree(root: str, failed: Optional[list] = None):
+    """Обходит дерево через os.scandir и выдаёт (путь, относительный путь, stat) файлов.
+
+    stat берётся из DirEntry, поэтому на каждый файл приходится не больше одного системного вызова.
+    Папки и файлы, которые не удалось прочитать, пропускаются; если передан список failed,
+    в него добавляется (относительный путь, ошибка).
+    """
+    # пути из scandir начинаются с root, так что отрезать префикс быстрее os.path.relpath
+    prefix_len = len(os.path.join(root, ""))
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError as e:
+            if failed is not None:
+                failed.append((folder[prefix_len:], e))
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    # как os.walk: ссылки на файлы включаются, в ссылки на папки не заходим
+                    yield entry.path, entry.path[prefix_len:], entry.stat()
+            except OSError as e:
+                if failed is not None:
+                    failed.append((entry.path[prefix_len:], e))
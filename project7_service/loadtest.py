@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Optional
+
+from service import HOST, PORT, Service
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+
+    @classmethod
+    async def connect(cls, host: str = HOST, port: int = PORT, unix_path: Optional[str] = None):
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def call(self, db: str, op: str, **args):
+        self._next_id += 1
+        request = {"id": self._next_id, "db": db, "op": op, "args": args}
+        self.writer.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def run_client(n_requests: int, write_ratio: float, latencies: dict, errors: list, **conn_args):
+    client = await Client.connect(**conn_args)
+    my_tasks = []
+    try:
+        for i in range(n_requests):
+            write = random.random() < write_ratio
+            if write and my_tasks and random.random() < 0.3:
+                name, call = "todo.mark_done", client.call("todo", "mark_done", task_id=my_tasks.pop())
+            elif write and random.random() < 0.5:
+                name, call = "todo.add_task", client.call("todo", "add_task", description=f"задача {i}")
+            elif write:
+                name = "phonebook.add_contact"
+                call = client.call("phonebook", "add_contact", name=f"Контакт {i}", phone=f"+7{random.randint(10**9, 10**10 - 1)}")
+            elif random.random() < 0.5:
+                name, call = "todo.fetch_tasks", client.call("todo", "fetch_tasks", done=False, limit=20)
+            else:
+                name, call = "phonebook.list_contacts", client.call("phonebook", "list_contacts", limit=20)
+            start = time.perf_counter()
+            try:
+                result = await call
+                if name == "todo.add_task":
+                    my_tasks.append(result)
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                continue
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+    finally:
+        await client.close()
+
+
+def print_report(latencies: dict, errors: list, elapsed: float):
+    total = sum(len(v) for v in latencies.values())
+    print(f"\nЗапросов: {total}, ошибок: {len(errors)}, время: {elapsed:.2f} с, {total / elapsed:.0f} запр/с")
+    print(f"\n{'Операция':<25} {'Кол-во':<8} {'p50, мс':<10} {'p99, мс':<10}")
+    print("-" * 55)
+    everything = []
+    for name in sorted(latencies):
+        values = sorted(latencies[name])
+        everything.extend(values)
+        print(f"{name:<25} {len(values):<8} {percentile(values, 50) * 1000:<10.2f} {percentile(values, 99) * 1000:<10.2f}")
+    everything.sort()
+    print(f"{'всего':<25} {len(everything):<8} {percentile(everything, 50) * 1000:<10.2f} {percentile(everything, 99) * 1000:<10.2f}")
+    if everything:
+        print(f"\nСреднее: {statistics.mean(everything) * 1000:.2f} мс")
+    for e in errors[:5]:
+        print("Ошибка:", e)
+
+
+async def run(clients: int, requests: int, write_ratio: float, in_process: bool, **conn_args):
+    service = server = None
+    tmp = None
+    if in_process:
+        tmp = tempfile.TemporaryDirectory()
+        service = Service(os.path.join(tmp.name, "tasks.db"), os.path.join(tmp.name, "phonebook.db"))
+        await service.start()
+        server = await asyncio.start_server(service.handle_client, HOST, 0)
+        conn_args = {"host": HOST, "port": server.sockets[0].getsockname()[1]}
+    latencies, errors = {}, []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_client(requests, write_ratio, latencies, errors, **conn_args) for _ in range(clients)))
+    finally:
+        elapsed = time.perf_counter() - start
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            await service.close()
+            tmp.cleanup()
+    print_report(latencies, errors, elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест локального сервиса")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", help="путь к Unix-сокету вместо TCP")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на одного клиента")
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--in-process", action="store_true", help="запустить сервис на временных базах")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.clients, args.requests, args.write_ratio, args.in_process,
+                    host=args.host, port=args.port, unix_path=args.unix))
+
+
+if __name__ == "__main__":
+    main()
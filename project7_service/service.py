@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "project2_phonebook"))
+sys.path.insert(0, os.path.join(ROOT, "project5_todo"))
+
+import phonebook  # noqa: E402
+import todo  # noqa: E402
+from common import storage  # noqa: E402
+
+HOST = "127.0.0.1"
+PORT = 8765
+READERS = 4  # соединений на чтение на каждую базу
+MAX_BATCH = 256  # операций записи в одной транзакции
+
+
+# --- операции над базами: (conn, **args) -> результат; SQL живёт в todo.py и phonebook.py ---
+
+def todo_add_task(conn, description: str):
+    # описание приходит от клиента как есть, проверка как в меню todo.py
+    description = description.strip()
+    if not description:
+        raise ValueError("Описание не может быть пустым.")
+    return todo.insert_task(conn, description)
+
+
+OPERATIONS = {
+    "todo": {
+        "add_task": ("write", todo_add_task),
+        "mark_done": ("write", todo.set_done),
+        "delete_task": ("write", todo.remove_task),
+        "fetch_tasks": ("read", todo.select_tasks),
+    },
+    "phonebook": {
+        "add_contact": ("write", phonebook.insert_contact),
+        "update_contact": ("write", phonebook.update_contact_row),
+        "delete_contact": ("write", phonebook.delete_contact_row),
+        "get_contact": ("read", phonebook.select_contact),
+        "list_contacts": ("read", phonebook.select_contacts),
+    },
+}
+
+
+class Database:
+    """Одна база: единственный писатель с пакетными коммитами и пул читателей.
+
+    Все записи идут через очередь в один поток, поэтому писатели не
+    конкурируют за блокировку, а WAL позволяет читать параллельно с записью.
+    """
+
+    def __init__(self, path: str, readers: int = READERS, max_batch: int = MAX_BATCH):
+        self.path = path
+        self.max_batch = max_batch
+        self._writer = self._connect()
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"writer-{path}")
+        self._read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix=f"reader-{path}")
+        self._readers = asyncio.Queue()
+        for _ in range(readers):
+            self._readers.put_nowait(self._connect())
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def _connect(self):
+        # WAL, synchronous и busy_timeout задаёт common.storage
+        return storage.open_connection(self.path, check_same_thread=False, isolation_level=None)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._write_loop())
+
+    async def write(self, func, args: dict):
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((func, args, fut))
+        return await fut
+
+    async def read(self, func, args: dict):
+        conn = await self._readers.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._read_executor, lambda: func(conn, **args))
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self._write_executor, self._commit_batch, batch)
+            except Exception as e:
+                results = [(False, e)] * len(batch)
+            for (_, _, fut), (ok, value) in zip(batch, results):
+                if fut.done():
+                    continue
+                if ok:
+                    fut.set_result(value)
+                else:
+                    fut.set_exception(value)
+
+    def _commit_batch(self, batch):
+        """Выполняет пакет одной транзакцией; ошибка одной операции откатывает только её"""
+        conn = self._writer
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for func, args, _ in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    results.append((True, func(conn, **args)))
+                    conn.execute("RELEASE op")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    results.append((False, e))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._write_executor.shutdown()
+        self._read_executor.shutdown()
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+
+class Service:
+    """Локальный сервис: запросы и ответы — JSON по одному на строку.
+
+    Запрос: {"id": 1, "db": "todo", "op": "add_task", "args": {"description": "..."}}
+    Ответ:  {"id": 1, "ok": true, "result": ...} или {"id": 1, "ok": false, "error": "..."}
+    """
+
+    def __init__(self, todo_db: Optional[str] = None, phonebook_db: Optional[str] = None, readers: int = READERS):
+        self.todo_db = todo_db or todo.DB_FILENAME
+        self.phonebook_db = phonebook_db or phonebook.DB_FILENAME
+        self.readers = readers
+        self.databases = {}
+
+    async def start(self):
+        todo.init_db(self.todo_db)
+        phonebook.init_db(self.phonebook_db)
+        self.databases = {
+            "todo": Database(self.todo_db, self.readers),
+            "phonebook": Database(self.phonebook_db, self.readers),
+        }
+        for db in self.databases.values():
+            db.start()
+
+    async def close(self):
+        for db in self.databases.values():
+            await db.close()
+
+    async def handle(self, request: dict):
+        db = self.databases.get(request.get("db"))
+        op = OPERATIONS.get(request.get("db"), {}).get(request.get("op"))
+        if db is None or op is None:
+            raise ValueError(f"Неизвестная операция: {request.get('db')}.{request.get('op')}")
+        kind, func = op
+        args = request.get("args") or {}
+        if kind == "write":
+            return await db.write(func, args)
+        return await db.read(func, args)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = {}
+                try:
+                    request = json.loads(line)
+                    response["id"] = request.get("id")
+                    response["result"] = await self.handle(request)
+                    response["ok"] = True
+                except Exception as e:
+                    response["ok"] = False
+                    response["error"] = str(e)
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT, unix_path: Optional[str] = None):
+        await self.start()
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+            print(f"Сервис слушает {unix_path}")
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            print(f"Сервис слушает {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервис для баз задач и телефонной книги")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", help="путь к Unix-сокету вместо TCP")
+    parser.add_argument("--todo-db", default=todo.DB_FILENAME)
+    parser.add_argument("--phonebook-db", default=phonebook.DB_FILENAME)
+    parser.add_argument("--readers", type=int, default=READERS)
+    args = parser.parse_args(argv)
+    service = Service(args.todo_db, args.phonebook_db, args.readers)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("Выход.")
+
+
+if __name__ == "__main__":
+    main()